@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate
 
 
 class TenderAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tender_app'
+
+    def ready(self):
+        from .search import ensure_sqlite_fts_triggers
+        post_migrate.connect(ensure_sqlite_fts_triggers, sender=self)
+
+        from .models import Bid, release_bid_document
+        post_delete.connect(release_bid_document, sender=Bid)
@@ -0,0 +1,189 @@
+"""
+Write-behind pipeline for TenderHistory (the tender audit log).
+
+With TENDER_AUDIT_MODE = 'async', history rows are handed to an in-process
+queue once the request's transaction commits, and a background thread inserts
+them with bulk_create in batches. Rows the thread cannot insert, and rows still
+queued when the process exits, are appended to a JSON-lines spool file that
+`manage.py flush_audit_spool` loads back. The default 'sync' mode inserts the
+rows immediately, inside the request, which is what the tests use.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.utils.dateparse import parse_datetime
+
+from .cache import bump_tender_version
+from .models import TenderHistory
+
+logger = logging.getLogger(__name__)
+
+# TenderHistory columns written to the spool file, besides the timestamp
+SPOOL_FIELDS = ('tender_id', 'action', 'field', 'old_value', 'new_value', 'changes', 'performed_by_id', 'user')
+
+
+def audit_setting(name, default=None):
+    return getattr(settings, f'TENDER_AUDIT_{name}', default)
+
+
+def write_rows(rows, batch_size=None):
+    """Insert history rows and invalidate the cached responses of their tenders."""
+    TenderHistory.objects.bulk_create(rows, batch_size=batch_size)
+    for tender_id in {row.tender_id for row in rows}:
+        bump_tender_version(tender_id)
+
+
+_spool_lock = threading.Lock()
+
+
+def spool(rows, path=None):
+    """Append rows to the spool file, one JSON object per line, and fsync it."""
+    path = path or audit_setting('SPOOL_PATH')
+    with _spool_lock, open(path, 'a', encoding='utf-8') as spool_file:
+        for row in rows:
+            record = {name: getattr(row, name) for name in SPOOL_FIELDS}
+            record['timestamp'] = row.timestamp.isoformat()
+            spool_file.write(json.dumps(record, cls=DjangoJSONEncoder) + '\n')
+        spool_file.flush()
+        os.fsync(spool_file.fileno())
+
+
+def replay_spool(path=None, batch_size=None):
+    """
+    Insert every spooled row and remove the spool. The file is renamed first,
+    so rows spooled meanwhile go to a fresh file. Returns the number of rows.
+    """
+    path = path or audit_setting('SPOOL_PATH')
+    batch_size = batch_size or audit_setting('BATCH_SIZE', 500)
+    work_path = f'{path}.replay'
+    # A replay that failed earlier leaves its work file behind; finish it first
+    if not os.path.exists(work_path):
+        if not os.path.exists(path):
+            return 0
+        os.replace(path, work_path)
+
+    rows = []
+    with open(work_path, encoding='utf-8') as work_file:
+        for line in work_file:
+            if line.strip():
+                record = json.loads(line)
+                timestamp = parse_datetime(record.pop('timestamp'))
+                rows.append(TenderHistory(timestamp=timestamp, **record))
+
+    with transaction.atomic():
+        write_rows(rows, batch_size)
+    os.remove(work_path)
+    return len(rows)
+
+
+class AuditWriter:
+    """
+    Background thread that drains a queue of unsaved TenderHistory rows into
+    bulk_create batches of up to `batch_size`, at least every `flush_interval`
+    seconds while rows are waiting.
+    """
+
+    def __init__(self, batch_size=500, flush_interval=0.5, spool_path=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_path = spool_path
+        self.pid = os.getpid()
+        self.queue = queue.Queue()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='tender-audit-writer', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def put(self, rows):
+        for row in rows:
+            self.queue.put(row)
+
+    def flush(self):
+        """Block until every row queued so far is inserted or spooled."""
+        self.queue.join()
+
+    def close(self, timeout=5.0):
+        """Stop the thread, then insert (or spool) whatever is still queued."""
+        self._stopping.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        while True:
+            rows = self._take(block=False)
+            if not rows:
+                break
+            self._write(rows)
+
+    def _take(self, block):
+        rows = []
+        try:
+            rows.append(self.queue.get(timeout=self.flush_interval) if block else self.queue.get_nowait())
+        except queue.Empty:
+            return rows
+        while len(rows) < self.batch_size:
+            try:
+                rows.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _run(self):
+        while not self._stopping.is_set():
+            rows = self._take(block=True)
+            if rows:
+                self._write(rows)
+
+    def _write(self, rows):
+        try:
+            close_old_connections()
+            write_rows(rows, self.batch_size)
+        except Exception:
+            logger.exception(f'Could not write {len(rows)} history rows, spooling them to {self.spool_path}')
+            try:
+                spool(rows, self.spool_path)
+            except Exception:
+                logger.exception(f'Could not spool {len(rows)} history rows; they are lost')
+        finally:
+            for _ in rows:
+                self.queue.task_done()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """The process's audit writer, started on first use (and again after a fork)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None or _writer.pid != os.getpid():
+            _writer = AuditWriter(
+                batch_size=audit_setting('BATCH_SIZE', 500),
+                flush_interval=audit_setting('FLUSH_INTERVAL', 0.5),
+                spool_path=audit_setting('SPOOL_PATH'),
+            ).start()
+            atexit.register(_writer.close)
+        return _writer
+
+
+def record_history(rows):
+    """
+    Write unsaved TenderHistory rows: right away in 'sync' mode, or through
+    the background writer once the current transaction commits in 'async' mode.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    if audit_setting('MODE', 'sync') != 'async':
+        write_rows(rows)
+        return
+    # Rows of a rolled-back request are never queued
+    transaction.on_commit(lambda: get_writer().put(rows))
@@ -0,0 +1,94 @@
+"""
+Versioned response cache for the public tender endpoints.
+
+Cached responses are keyed by the request path and the query parameters that
+shape the body, plus a version counter: the global tender version for list
+views and the per-tender version for detail views. Writers bump the versions
+instead of deleting keys, so a stale entry is simply never looked up again and
+expires after TENDER_RESPONSE_CACHE_TIMEOUT. Works with any Django cache
+backend; use a shared one (Redis, Memcached) when running several workers.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+GLOBAL_VERSION_KEY = 'tender_app:version:global'
+# Part of every key; bumping it invalidates every cached list and detail at once
+EPOCH_VERSION_KEY = 'tender_app:version:epoch'
+
+
+def tender_version_key(tender_id):
+    return f'tender_app:version:tender:{tender_id}'
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a counter evicted from the cache can never
+        # come back with a value an old entry was stored under
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_tender_version(tender_id=None):
+    """
+    Invalidate cached responses for one tender (and every list), or for every
+    list only when no tender is given. The bump is repeated once the current
+    transaction commits, so a reader racing the commit cannot re-cache old rows.
+    """
+    keys = [GLOBAL_VERSION_KEY]
+    if tender_id is not None:
+        keys.append(tender_version_key(tender_id))
+    _bump(keys)
+    transaction.on_commit(lambda: _bump(keys))
+
+
+def bump_all_tender_versions():
+    """Invalidate every cached tender response, e.g. after a bulk rewrite of many tenders."""
+    _bump([EPOCH_VERSION_KEY])
+    transaction.on_commit(lambda: _bump([EPOCH_VERSION_KEY]))
+
+
+# Query parameters that change a tender response body; the rest (e.g. the
+# frontend's cacheBust timestamps) are left out of the key
+RESPONSE_CACHE_PARAMS = (
+    'cursor', 'page_size', 'ordering', 'fields', 'expand', 'search',
+    'category', 'status', 'deadline_before', 'deadline_after', 'facets',
+)
+
+
+def response_cache_key(request, tender_id=None):
+    version_key = GLOBAL_VERSION_KEY if tender_id is None else tender_version_key(tender_id)
+    query = sorted((name, values) for name, values in request.query_params.lists() if name in RESPONSE_CACHE_PARAMS)
+    versions = f'{get_version(EPOCH_VERSION_KEY)}.{get_version(version_key)}'
+    raw = f'{request.get_host()}|{request.path}|{query}|{versions}'
+    return 'tender_app:response:' + hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def cached_response(request, build, tender_id=None):
+    """
+    Return the cached body for this request if there is one, otherwise call
+    `build()` and cache its data when it succeeds.
+    """
+    key = response_cache_key(request, tender_id)
+    data = cache.get(key)
+    if data is not None:
+        return Response(data)
+
+    response = build()
+    if response.status_code == 200:
+        cache.set(key, response.data, timeout=getattr(settings, 'TENDER_RESPONSE_CACHE_TIMEOUT', 300))
+    return response
@@ -0,0 +1,74 @@
+"""
+Conditional GET support (ETag / Last-Modified) for the polled tender endpoints.
+
+The validators come from timestamps — tender creation, the latest history
+entry, the latest award and the last bid statistics update — and the tender's
+denormalized bid statistics, so a 304 costs one small query and no
+serialization.
+"""
+import hashlib
+
+from django.db.models import OuterRef, Subquery
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import Tender, TenderHistory, Bid
+
+
+def tender_validators(tender_id):
+    """
+    Return (etag_seed, last_modified) for a tender, or None if it does not exist.
+    Every change to a tender writes history, every award stamps awarded_at
+    and every bid created, repriced or deleted stamps bid_stats_updated_at,
+    so the newest of these timestamps moves whenever the payload can change.
+    The statistics themselves are part of the seed too.
+    """
+    latest_history = TenderHistory.objects.filter(tender=OuterRef('pk')).order_by('-timestamp').values('timestamp')[:1]
+    latest_award = Bid.objects.filter(
+        tender=OuterRef('pk'), awarded_at__isnull=False
+    ).order_by('-awarded_at').values('awarded_at')[:1]
+
+    row = Tender.objects.filter(pk=tender_id).annotate(
+        latest_history=Subquery(latest_history),
+        latest_award=Subquery(latest_award),
+    ).values_list(
+        'created_at', 'latest_history', 'latest_award', 'winner_date', 'bid_stats_updated_at', *Tender.BID_STAT_FIELDS,
+    ).first()
+    if row is None:
+        return None
+
+    timestamps = [value for value in row[:5] if value is not None]
+    seed = '|'.join(value.isoformat() for value in timestamps)
+    seed += '|' + '|'.join(str(value) for value in row[5:])
+    return seed, max(timestamps)
+
+
+def conditional_tender_response(request, tender_id, build):
+    """
+    Answer 304 Not Modified when the client's validators still match the
+    tender, otherwise call `build()` and attach ETag and Last-Modified to it.
+    """
+    try:
+        validators = tender_validators(int(tender_id))
+    except (TypeError, ValueError):
+        validators = None
+    if validators is None:
+        return build()
+
+    seed, last_modified = validators
+    # Different query parameters (?fields, ?expand) give different bodies
+    raw = f'{tender_id}|{request.get_full_path()}|{seed}'
+    etag = '"{}"'.format(hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32])
+    last_modified = int(last_modified.timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = build()
+        if response.status_code != 200:
+            return response
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Let clients keep the body but always revalidate it
+    patch_cache_control(response, no_cache=True)
+    return response
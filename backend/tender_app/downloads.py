@@ -0,0 +1,241 @@
+"""
+Permission-checked download of bid documents, one at a time or as a ZIP of
+every document of a tender.
+
+The view decides who may read a document; the bytes are best sent by the
+front web server. With TENDER_DOCUMENT_OFFLOAD = 'x-accel-redirect' (nginx)
+or 'x-sendfile' (Apache, lighttpd) the response is an empty body carrying the
+file's location, and the server streams the file itself, Range requests
+included, without holding an application worker. For nginx that needs an
+internal location matching TENDER_DOCUMENT_ACCEL_PREFIX:
+
+    location /protected-media/ {
+        internal;
+        alias /path/to/backend/media/;
+    }
+
+Without offloading the file is sent by FileResponse: a full response hands the
+open file to the WSGI server's file wrapper (sendfile() under gunicorn), and a
+single byte range is streamed in blocks. Either way conditional requests
+(If-None-Match, If-Modified-Since, If-Range) are answered here first.
+
+The ZIP bundle is written on the fly into a StreamingHttpResponse: entries
+are stored uncompressed (PDFs and office files are compressed already) and
+copied in blocks, so neither a temporary file nor the bundle is ever held
+whole, and memory stays flat whatever its size.
+"""
+import csv
+import hashlib
+import io
+import mimetypes
+import os
+import re
+import zipfile
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+from .uploads import LimitedReader
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+BUNDLE_BLOCK_SIZE = 64 * 1024
+
+BUNDLE_MANIFEST_COLUMNS = [
+    'bid_id', 'company', 'company_name', 'bidding_price', 'submission_date', 'is_winner', 'document', 'size',
+]
+
+
+def document_setting(name, default=None):
+    return getattr(settings, f'TENDER_DOCUMENT_{name}', default)
+
+
+def document_validators(fieldfile):
+    """Return (size, etag, last_modified) of a stored document; last_modified may be None."""
+    storage, name = fieldfile.storage, fieldfile.name
+    size = storage.size(name)
+    try:
+        last_modified = int(storage.get_modified_time(name).timestamp())
+    except NotImplementedError:
+        last_modified = None
+    # Upload names are never reused for different content, so name, size and mtime identify it
+    raw = f'{name}|{size}|{last_modified}'
+    etag = '"{}"'.format(hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32])
+    return size, etag, last_modified
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) inclusive for a single-range `Range` header, None to
+    serve the whole file (no header, several ranges, or a unit we do not
+    know), or False when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match((header or '').replace(' ', ''))
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if not length:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    """A Range request may only be honoured if its If-Range validator still matches."""
+    validator = request.META.get('HTTP_IF_RANGE')
+    if not validator:
+        return True
+    if validator.startswith('"') or validator.startswith('W/'):
+        return validator == etag
+    return last_modified is not None and parse_http_date_safe(validator) == last_modified
+
+
+def offloaded_response(fieldfile, filename, mode):
+    response = HttpResponse()
+    # The front server fills in the type, length and any range from the file
+    del response['Content-Type']
+    if mode == 'x-accel-redirect':
+        prefix = document_setting('ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(fieldfile.name)
+    else:
+        response['X-Sendfile'] = fieldfile.storage.path(fieldfile.name)
+    response['Content-Disposition'] = content_disposition_header(False, filename)
+    return response
+
+
+def file_response(request, fieldfile, filename, size, etag, last_modified):
+    byte_range = None
+    if if_range_matches(request, etag, last_modified):
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    content_type = mimetypes.guess_type(fieldfile.name)[0] or 'application/octet-stream'
+    document = fieldfile.storage.open(fieldfile.name, 'rb')
+    if byte_range is None:
+        response = FileResponse(document, filename=filename, content_type=content_type)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        document.seek(start)
+        # Without a fileno the WSGI server cannot sendfile() past the range
+        response = FileResponse(LimitedReader(document, end - start + 1),
+                                filename=filename, content_type=content_type)
+        response._resource_closers.append(document.close)
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def document_response(request, fieldfile, filename=None):
+    """
+    Serve a stored document to a client that is allowed to read it, as
+    `filename` (by default the last part of its storage name).
+    """
+    filename = filename or os.path.basename(fieldfile.name)
+    size, etag, last_modified = document_validators(fieldfile)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        mode = document_setting('OFFLOAD')
+        if mode:
+            response = offloaded_response(fieldfile, filename, mode)
+        else:
+            response = file_response(request, fieldfile, filename, size, etag, last_modified)
+
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Documents are private to the city's users and the bidding company
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+class ZipStream:
+    """Unseekable file-like object that collects what zipfile writes until it is taken."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _zip_time(value):
+    # ZIP timestamps cannot predate 1980
+    return max(timezone.localtime(value).timetuple()[:6], (1980, 1, 1, 0, 0, 0))
+
+
+def iter_document_bundle(bids):
+    """
+    Yield a ZIP of every bid's document, as <bid id>-<company>/<filename>,
+    preceded by manifest.csv. Documents missing from storage are listed in
+    the manifest with an empty name.
+    """
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as bundle:
+        entries, manifest = [], io.StringIO()
+        writer = csv.writer(manifest)
+        writer.writerow(BUNDLE_MANIFEST_COLUMNS)
+        for bid in bids:
+            fieldfile = bid.documents
+            arcname, size = '', ''
+            if fieldfile and fieldfile.storage.exists(fieldfile.name):
+                arcname = f'{bid.pk}-{bid.company.username}/{bid.document_filename}'
+                size = fieldfile.storage.size(fieldfile.name)
+                entries.append((arcname, bid))
+            profile = getattr(bid.company, 'company_profile', None)
+            writer.writerow([
+                bid.pk, bid.company.username, profile.company_name if profile else '',
+                bid.bidding_price, bid.submission_date.isoformat(), bid.is_winner, arcname, size,
+            ])
+        bundle.writestr('manifest.csv', manifest.getvalue())
+        yield stream.take()
+
+        for arcname, bid in entries:
+            info = zipfile.ZipInfo(arcname, date_time=_zip_time(bid.submission_date))
+            info.compress_type = zipfile.ZIP_STORED
+            with bid.documents.storage.open(bid.documents.name, 'rb') as document, \
+                    bundle.open(info, 'w', force_zip64=True) as entry:
+                for block in iter(lambda: document.read(BUNDLE_BLOCK_SIZE), b''):
+                    entry.write(block)
+                    yield stream.take()
+            yield stream.take()
+    # The central directory is written when the archive closes
+    yield stream.take()
+
+
+def bundle_response(tender, bids):
+    response = StreamingHttpResponse(iter_document_bundle(bids), content_type='application/zip')
+    response['Content-Disposition'] = content_disposition_header(True, f'tender-{tender.pk}-documents.zip')
+    return response
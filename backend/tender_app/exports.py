@@ -0,0 +1,99 @@
+"""
+Streaming CSV / NDJSON export of tenders, bids and tender history.
+
+Rows are read with values_list().iterator(), so neither the queryset cache nor
+model instances are built, and each encoded line is yielded as soon as it is
+ready. Memory use stays flat whatever the number of rows.
+"""
+import csv
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from .models import Tender, Bid, TenderHistory
+from .search import filter_tenders
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = {
+    'tenders': [
+        'id', 'title', 'description', 'budget', 'category', 'requirements', 'status',
+        'notice_date', 'submission_deadline', 'winner_date', 'construction_start', 'construction_end',
+        'created_by__username', 'created_at', 'winning_bid_id',
+        'bid_count', 'bid_min_price', 'bid_max_price',
+    ],
+    'bids': [
+        'id', 'tender_id', 'tender__title', 'company_id', 'company__username', 'bidding_price',
+        'documents', 'submission_date', 'is_winner', 'awarded_at', 'additional_notes',
+    ],
+    'history': [
+        'id', 'tender_id', 'action', 'field', 'old_value', 'new_value', 'changes',
+        'performed_by__username', 'user', 'timestamp',
+    ],
+}
+
+
+def export_queryset(dataset, params, bids=None):
+    """
+    Queryset for one dataset, filtered with the search action's parameters.
+    Bids and history are limited to the tenders those parameters select;
+    `bids` lets the caller pass an already permission-scoped bid queryset.
+    """
+    tenders = filter_tenders(Tender.objects.all(), params)
+    if dataset == 'tenders':
+        queryset = tenders
+    elif dataset == 'bids':
+        queryset = (bids if bids is not None else Bid.objects.all()).filter(tender__in=tenders.values('pk'))
+    elif dataset == 'history':
+        queryset = TenderHistory.objects.filter(tender__in=tenders.values('pk'))
+    else:
+        raise ValueError(f'Unknown export dataset: {dataset}')
+    # Stable primary key order, which also drops the search rank ordering
+    return queryset.order_by('pk')
+
+
+class Echo:
+    """File-like object whose write() hands the line back, for csv.writer."""
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def iter_export(queryset, columns, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the encoded lines of an export, header first for CSV."""
+    rows = queryset.values_list(*columns).iterator(chunk_size=chunk_size)
+    if export_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow([_csv_value(value) for value in row])
+    elif export_format == 'ndjson':
+        for row in rows:
+            yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
+    else:
+        raise ValueError(f'Unknown export format: {export_format}')
+
+
+def export_response(queryset, dataset, export_format):
+    response = StreamingHttpResponse(
+        iter_export(queryset, EXPORT_COLUMNS[dataset], export_format),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{export_format}"'
+    return response
@@ -0,0 +1,86 @@
+"""
+Bulk tender import for migrations from legacy systems.
+
+Every row is validated with the tender serializer first, without touching the
+database, and the valid ones are then written with bulk_create in batches,
+together with their CREATE history rows. A 10k row import costs a few dozen
+INSERT statements instead of 20k.
+"""
+from django.db import connection, transaction
+from django.db.models import Max
+from rest_framework.exceptions import ValidationError
+
+from .cache import bump_tender_version
+from .models import Tender, TenderHistory
+from .serializers import TenderSerializer
+
+IMPORT_BATCH_SIZE = 500
+
+
+class TenderImportSerializer(TenderSerializer):
+    """Validation-only serializer: the creator comes from the importing user."""
+
+    class Meta(TenderSerializer.Meta):
+        read_only_fields = TenderSerializer.Meta.read_only_fields + ['created_by']
+
+
+def validate_tender_rows(rows):
+    """
+    Validate every payload and return (valid, errors): a list of
+    (index, validated_data) pairs and a list of {'index', 'errors'} dicts.
+    """
+    # One serializer for all rows: building its fields is far more expensive
+    # than validating a row, so it must not happen 10k times
+    serializer = TenderImportSerializer()
+    valid, errors = [], []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append({'index': index, 'errors': {'non_field_errors': ['Expected an object.']}})
+            continue
+        try:
+            valid.append((index, serializer.run_validation(row)))
+        except ValidationError as e:
+            errors.append({'index': index, 'errors': e.detail})
+    return valid, errors
+
+
+def _insert_tenders(tenders, user):
+    if connection.features.can_return_rows_from_bulk_insert:
+        return Tender.objects.bulk_create(tenders)
+
+    # MySQL does not hand back the new primary keys, so read them back. The
+    # caller's transaction keeps another import by the same user from
+    # interleaving with this batch in the same key range.
+    start = Tender.objects.aggregate(last=Max('pk'))['last'] or 0
+    Tender.objects.bulk_create(tenders)
+    ids = list(Tender.objects.filter(pk__gt=start, created_by=user).order_by('pk').values_list('pk', flat=True))
+    if len(ids) != len(tenders):
+        raise RuntimeError('Could not read back the primary keys of imported tenders')
+    for tender, pk in zip(tenders, ids):
+        tender.pk = pk
+    return tenders
+
+
+def import_tenders(rows, user, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Create a tender, with its CREATE history entry, for every valid row.
+    Returns (created_ids, errors); invalid rows are reported and skipped.
+    """
+    valid, errors = validate_tender_rows(rows)
+    created_ids = []
+
+    with transaction.atomic():
+        for start in range(0, len(valid), batch_size):
+            batch = valid[start:start + batch_size]
+            tenders = _insert_tenders([Tender(created_by=user, **data) for _, data in batch], user)
+            TenderHistory.objects.bulk_create([
+                TenderHistory(tender=tender, action='CREATE', changes={}, performed_by=user)
+                for tender in tenders
+            ])
+            created_ids.extend(tender.pk for tender in tenders)
+
+        if created_ids:
+            # New tenders only show up in list responses
+            bump_tender_version()
+
+    return created_ids, errors
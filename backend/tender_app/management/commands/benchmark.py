@@ -0,0 +1,267 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from tender_app import audit
+from tender_app.imports import import_tenders, validate_tender_rows
+from tender_app.models import User, CompanyProfile, Tender, TenderHistory, Bid, WinnerSnapshot
+from tender_app.search import search_tenders
+from tender_app.serializers import TenderSerializer, TenderListSerializer
+from tender_app.views import BidViewSet, TenderViewSet
+
+
+class Command(BaseCommand):
+    help = 'Run a performance benchmark on a throwaway dataset that is rolled back afterwards'
+
+    scenarios = ['serialize', 'search', 'import', 'award', 'patch', 'audit']
+    # Scenarios with background threads that must see committed rows; they clean up by deleting the user
+    committed_scenarios = ['audit']
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=self.scenarios)
+        parser.add_argument('--tenders', type=int, default=10000, help='Number of tenders to seed')
+        parser.add_argument('--history', type=int, default=5, help='History rows per tender')
+        parser.add_argument('--bids', type=int, default=20, help='Bids on the awarded tender (award scenario)')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per variant (audit scenario)')
+
+    def handle(self, *args, **options):
+        bench = getattr(self, f"bench_{options['scenario']}")
+        if options['scenario'] in self.committed_scenarios:
+            self.user = User.objects.create_user(username=f'bench-{time.time_ns()}', user_type='CITY')
+            try:
+                bench(options)
+            finally:
+                # Cascades to the benchmark tenders and their history
+                self.user.delete()
+            return
+
+        with transaction.atomic():
+            self.user = User.objects.create_user(username=f'bench-{time.time_ns()}', user_type='CITY')
+            bench(options)
+            # Never leave benchmark rows behind
+            transaction.set_rollback(True)
+
+    def seed_tenders(self, count, history=0):
+        now = timezone.now()
+        categories = [code for code, _ in Tender.CATEGORY_CHOICES]
+        statuses = [code for code, _ in Tender.STATUS_CHOICES]
+        Tender.objects.bulk_create(
+            [
+                Tender(
+                    title=f'Benchmark tender {i}',
+                    description=f'Benchmark description {i} ' * 10,
+                    requirements='Benchmark requirements',
+                    budget=1000 + i,
+                    category=categories[i % len(categories)],
+                    status=statuses[i % len(statuses)],
+                    notice_date=now,
+                    submission_deadline=now + timedelta(days=i % 60),
+                    created_by=self.user,
+                )
+                for i in range(count)
+            ],
+            batch_size=1000,
+        )
+        tenders = list(Tender.objects.filter(created_by=self.user))
+        if history:
+            TenderHistory.objects.bulk_create(
+                [
+                    TenderHistory(tender=tender, action='UPDATE', field='title',
+                                  old_value='old', new_value='new', performed_by=self.user)
+                    for tender in tenders
+                    for _ in range(history)
+                ],
+                batch_size=1000,
+            )
+        return tenders
+
+    def measure(self, label, func):
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        self.stdout.write(f'{label:<40} {elapsed * 1000:10.1f} ms {len(queries):8d} queries')
+        return result
+
+    def bench_serialize(self, options):
+        """Payload size and serialization time of the full vs compact tender list."""
+        self.seed_tenders(options['tenders'], options['history'])
+        queryset = Tender.objects.filter(created_by=self.user).select_related('created_by')
+        variants = [
+            ('full (with history)', lambda: TenderSerializer(queryset.all(), many=True).data),
+            ('compact list', lambda: TenderListSerializer(queryset.all(), many=True).data),
+            ('compact ?fields=id,title,status', lambda: TenderListSerializer(
+                queryset.all(), many=True, context={'fields': ['id', 'title', 'status']}).data),
+        ]
+        for label, func in variants:
+            payload = self.measure(label, lambda: JSONRenderer().render(func()))
+            self.stdout.write(f"{'':<40} {len(payload) / 1024:10.1f} KiB")
+
+    def bench_search(self, options):
+        """Full-text index lookup vs the old leading-wildcard icontains filter."""
+        self.seed_tenders(options['tenders'])
+        queryset = Tender.objects.filter(created_by=self.user)
+        for term in ['description 4242', 'benchmark', 'nomatch']:
+            self.measure(f"icontains '{term}'", lambda: list(queryset.filter(
+                Q(title__icontains=term) | Q(description__icontains=term)
+            ).values_list('id', flat=True)))
+            self.measure(f"{connection.vendor} full-text '{term}'", lambda: list(
+                search_tenders(queryset, term).order_by('-search_rank').values_list('id', flat=True)
+            ))
+
+
+    def bench_import(self, options):
+        """Bulk tender import vs one create plus one history insert per tender."""
+        now = timezone.now()
+        rows = [
+            {
+                'title': f'Imported tender {i}',
+                'description': f'Imported description {i}',
+                'budget': str(1000 + i),
+                'notice_date': now.isoformat(),
+                'submission_deadline': (now + timedelta(days=30)).isoformat(),
+            }
+            for i in range(options['tenders'])
+        ]
+
+        def one_by_one():
+            valid, _ = validate_tender_rows(rows)
+            for _, data in valid:
+                tender = Tender.objects.create(created_by=self.user, **data)
+                TenderHistory.objects.create(tender=tender, action='CREATE', changes={}, performed_by=self.user)
+
+        with transaction.atomic():
+            self.measure('one create per tender', one_by_one)
+            transaction.set_rollback(True)
+        self.measure('bulk import', lambda: import_tenders(rows, self.user))
+
+    def seed_award(self, bids):
+        tender = self.seed_tenders(1)[0]
+        company = User.objects.create_user(username=f'bench-company-{time.time_ns()}', user_type='COMPANY')
+        CompanyProfile.objects.create(user=company, company_name='Benchmark company',
+                                      contact_email='bench@example.com', registration_number='1')
+        Bid.objects.bulk_create([
+            Bid(tender=tender, company=company, bidding_price=900 + i, documents='bid_documents/bench.pdf')
+            for i in range(bids)
+        ])
+        return Bid.objects.with_related().filter(tender=tender).first()
+
+    def legacy_award(self, bid):
+        """The statements select_winner issued before the award went through Tender.objects.award."""
+        bid = Bid.objects.with_related().get(pk=bid.pk)
+        tender = bid.tender
+        awarded_at = timezone.now()
+        with transaction.atomic():
+            Bid.objects.filter(tender=tender).update(is_winner=False, awarded_at=None)
+            bid.is_winner = True
+            bid.awarded_at = awarded_at
+            bid.save(update_fields=['is_winner', 'awarded_at'])
+            tender.status = 'AWARDED'
+            tender.winning_bid = bid
+            tender.winner_date = awarded_at
+            tender.save(update_fields=['status', 'winning_bid', 'winner_date'])
+            WinnerSnapshot.from_bid(bid, awarded_at).save()
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE tender_app_bid SET is_winner = %s, awarded_at = %s WHERE id = %s',
+                           [True, awarded_at, bid.id])
+            cursor.execute('UPDATE tender_app_tender SET status = %s, winning_bid_id = %s, winner_date = %s '
+                           'WHERE id = %s', ['AWARDED', bid.id, awarded_at, tender.id])
+        TenderHistory.objects.create(tender=tender, action='UPDATE', changes={}, performed_by=self.user)
+        Bid.objects.get(id=bid.id)
+        Tender.objects.get(id=tender.id)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT b.id, b.is_winner, b.tender_id, t.status, t.winning_bid_id '
+                           'FROM tender_app_bid b JOIN tender_app_tender t ON b.tender_id = t.id '
+                           'WHERE b.id = %s', [bid.id])
+            cursor.fetchone()
+
+    def bench_award(self, options):
+        """Statements and time of one winner selection, before and after the single-transaction rework."""
+        with transaction.atomic():
+            bid = self.seed_award(options['bids'])
+            self.measure('legacy select_winner', lambda: self.legacy_award(bid))
+            transaction.set_rollback(True)
+
+        bid = self.seed_award(options['bids'])
+        request = APIRequestFactory().post(f'/api/bids/{bid.pk}/select_winner/')
+        force_authenticate(request, user=self.user)
+        view = BidViewSet.as_view({'post': 'select_winner'})
+        response = self.measure('select_winner', lambda: view(request, pk=bid.pk))
+        self.stdout.write(f"{'':<40} status {response.status_code}")
+
+    def legacy_patch(self, tender_id, data):
+        """The serializations and inserts a tender PATCH cost before history came from the model diff."""
+        def fetch():
+            return Tender.objects.select_related('created_by').prefetch_related(
+                TenderViewSet.history_prefetch()
+            ).get(pk=tender_id)
+
+        tender = fetch()
+        original_data = TenderSerializer(tender).data
+        serializer = TenderSerializer(tender, data=data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        old_data = TenderSerializer(fetch()).data
+        tender = serializer.save()
+        new_data = TenderSerializer(tender).data
+        changes = {field: {'old': old_data[field], 'new': new_data[field]}
+                   for field in new_data if field in old_data and old_data[field] != new_data[field]}
+        TenderHistory.objects.create(tender=tender, action='UPDATE', changes=changes, performed_by=self.user)
+        updated_data = serializer.data
+        for field in updated_data:
+            if field in original_data and original_data[field] != updated_data[field]:
+                TenderHistory.objects.create(tender=tender, action='UPDATE', field=field,
+                                             old_value=str(original_data[field]),
+                                             new_value=str(updated_data[field]), performed_by=self.user)
+        return updated_data
+
+    def bench_patch(self, options):
+        """PATCH latency on a tender with a long history, legacy serialize-and-diff vs model diff."""
+        tender = self.seed_tenders(1, options['history'])[0]
+        self.stdout.write(f"tender with {options['history']} history rows")
+        data = {'title': 'Patched title', 'budget': '4321.00', 'requirements': 'Patched requirements'}
+
+        with transaction.atomic():
+            self.measure('legacy PATCH', lambda: self.legacy_patch(tender.pk, data))
+            transaction.set_rollback(True)
+
+        request = APIRequestFactory().patch(f'/api/tenders/{tender.pk}/', data, format='json')
+        force_authenticate(request, user=self.user)
+        view = TenderViewSet.as_view({'patch': 'partial_update'})
+        response = self.measure('PATCH', lambda: view(request, pk=tender.pk).render())
+        self.stdout.write(f"{'':<40} status {response.status_code}")
+
+    def bench_audit(self, options):
+        """p50/p99 latency of a tender PATCH (perform_update) with synchronous vs write-behind history."""
+        # One tender per variant, so both render the same amount of history
+        tenders = self.seed_tenders(2)
+        view = TenderViewSet.as_view({'patch': 'partial_update'})
+        factory = APIRequestFactory()
+
+        for mode, tender in zip(['sync', 'async'], tenders):
+            timings = []
+            with override_settings(TENDER_AUDIT_MODE=mode):
+                for i in range(options['requests']):
+                    data = {'title': f'{mode} title {i}', 'budget': str(1000 + i), 'requirements': f'{mode} {i}'}
+                    request = factory.patch(f'/api/tenders/{tender.pk}/', data, format='json')
+                    force_authenticate(request, user=self.user)
+                    start = time.perf_counter()
+                    view(request, pk=tender.pk).render()
+                    timings.append((time.perf_counter() - start) * 1000)
+                if mode == 'async':
+                    audit.get_writer().flush()
+            percentiles = statistics.quantiles(timings, n=100)
+            self.stdout.write(f'{mode:<10} p50 {percentiles[49]:8.2f} ms   p99 {percentiles[98]:8.2f} ms')
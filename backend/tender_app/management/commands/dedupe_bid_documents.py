@@ -0,0 +1,54 @@
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from tender_app.models import Bid, DocumentBlob
+from tender_app.storage import blob_digest, document_storage
+
+
+class Command(BaseCommand):
+    help = ('Move bid documents stored by name into the content-addressed store, '
+            'then rebuild the blob reference counts and delete unreferenced blobs')
+
+    def handle(self, *args, **options):
+        storage = document_storage()
+        moved = 0
+        legacy = Bid.objects.exclude(documents='').only('pk', 'documents').order_by('pk')
+        for bid in legacy.iterator(chunk_size=500):
+            old_name = bid.documents.name
+            if blob_digest(old_name) is not None or not storage.exists(old_name):
+                continue
+            with storage.open(old_name, 'rb') as document:
+                new_name = storage.save(old_name, document)
+            # Every bid sharing the old file moves with it, keeping the old name for downloads;
+            # all are counted below
+            sharing = Bid.objects.filter(documents=old_name)
+            sharing.filter(document_name='').update(document_name=os.path.basename(old_name)[:255])
+            sharing.update(documents=new_name)
+            storage.delete(old_name)
+            moved += 1
+
+        with transaction.atomic():
+            counts = dict(
+                Bid.objects.exclude(documents='').values_list('documents').annotate(n=Count('pk')).order_by()
+            )
+            counts = {name: count for name, count in counts.items() if blob_digest(name) is not None}
+            blobs = {blob.name: blob for blob in DocumentBlob.objects.select_for_update()}
+            for name, count in counts.items():
+                blob = blobs.pop(name, None)
+                if blob is None:
+                    DocumentBlob.objects.create(name=name, digest=blob_digest(name),
+                                                size=storage.size(name), refcount=count)
+                elif blob.refcount != count:
+                    DocumentBlob.objects.filter(pk=blob.pk).update(refcount=count)
+            DocumentBlob.objects.filter(pk__in=[blob.pk for blob in blobs.values()]).delete()
+
+        for name in blobs:
+            DocumentBlob.delete_orphan_file(name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Moved {moved} documents, {len(counts)} blobs referenced, '
+            f'{len(blobs)} unreferenced blobs deleted'
+        ))
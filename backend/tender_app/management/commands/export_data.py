@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from tender_app.exports import EXPORT_CHUNK_SIZE, EXPORT_COLUMNS, EXPORT_FORMATS, export_queryset, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Stream tenders, bids or tender history to a CSV or NDJSON file with constant memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(EXPORT_COLUMNS))
+        parser.add_argument('--export-format', choices=list(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write to (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='Rows fetched per database round trip')
+        # Same filters as the tender search action
+        parser.add_argument('--category')
+        parser.add_argument('--status')
+        parser.add_argument('--deadline-before', help='YYYY-MM-DD')
+        parser.add_argument('--deadline-after', help='YYYY-MM-DD')
+        parser.add_argument('--search')
+
+    def handle(self, *args, **options):
+        params = {
+            name: options[name]
+            for name in ('category', 'status', 'deadline_before', 'deadline_after', 'search')
+            if options[name]
+        }
+        queryset = export_queryset(options['dataset'], params)
+        lines = iter_export(queryset, EXPORT_COLUMNS[options['dataset']], options['export_format'],
+                            chunk_size=options['chunk_size'])
+
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            for line in lines:
+                output.write(line)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from tender_app.audit import audit_setting, replay_spool
+
+
+class Command(BaseCommand):
+    help = 'Insert the tender history rows the async audit writer spooled to disk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Spool file (default: TENDER_AUDIT_SPOOL_PATH)')
+
+    def handle(self, *args, **options):
+        path = options['path'] or audit_setting('SPOOL_PATH')
+        count = replay_spool(path)
+        self.stdout.write(self.style.SUCCESS(f'Inserted {count} spooled history rows from {path}'))
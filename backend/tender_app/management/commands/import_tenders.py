@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tender_app.imports import IMPORT_BATCH_SIZE, import_tenders
+from tender_app.models import User
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create tenders from a JSON array or NDJSON file (e.g. one written by export_data)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='.json file holding a list of tenders, or .ndjson with one per line')
+        parser.add_argument('--user', required=True, help='Username of the city user the tenders are created by')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']}")
+
+        with open(options['path'], encoding='utf-8') as source:
+            try:
+                if options['path'].endswith('.ndjson'):
+                    rows = [json.loads(line) for line in source if line.strip()]
+                else:
+                    rows = json.load(source)
+            except json.JSONDecodeError as e:
+                raise CommandError(f'Invalid JSON: {e}')
+        if not isinstance(rows, list):
+            raise CommandError('Expected a list of tenders')
+
+        created_ids, errors = import_tenders(rows, user, batch_size=options['batch_size'])
+        for error in errors:
+            self.stderr.write(f"Row {error['index']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(created_ids)} tenders, skipped {len(errors)} invalid rows'
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tender_app.cache import bump_all_tender_versions
+from tender_app.models import Tender
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized bid statistics (count, total, min, max) of every tender from its bids'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tender_ids', nargs='*', type=int, help='Only rebuild these tenders')
+
+    def handle(self, *args, **options):
+        tenders = Tender.objects.all()
+        if options['tender_ids']:
+            tenders = tenders.filter(pk__in=options['tender_ids'])
+
+        with transaction.atomic():
+            updated = tenders.refresh_bid_stats()
+            bump_all_tender_versions()
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt bid statistics for {updated} tenders'))
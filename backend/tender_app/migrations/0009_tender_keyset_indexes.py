@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-17 18:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tender_app', '0008_tenderhistory_field_tenderhistory_new_value_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['created_at', 'id'], name='tender_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['submission_deadline', 'id'], name='tender_deadline_id_idx'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.1.7 on 2026-10-17 18:35
+
+import django.db.models.deletion
+import tender_app.models
+from django.db import migrations, models
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tender_app_tender_fts USING fts5(
+        title, description, requirements,
+        content='tender_app_tender', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    # Rank title matches above description and requirements matches
+    "INSERT INTO tender_app_tender_fts(tender_app_tender_fts, rank) VALUES('rank', 'bm25(10.0, 1.0, 2.0)')",
+    """
+    CREATE TRIGGER IF NOT EXISTS tender_app_tender_fts_ai AFTER INSERT ON tender_app_tender BEGIN
+        INSERT INTO tender_app_tender_fts(rowid, title, description, requirements)
+        VALUES (new.id, new.title, new.description, new.requirements);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tender_app_tender_fts_ad AFTER DELETE ON tender_app_tender BEGIN
+        INSERT INTO tender_app_tender_fts(tender_app_tender_fts, rowid, title, description, requirements)
+        VALUES ('delete', old.id, old.title, old.description, old.requirements);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tender_app_tender_fts_au
+    AFTER UPDATE OF title, description, requirements ON tender_app_tender BEGIN
+        INSERT INTO tender_app_tender_fts(tender_app_tender_fts, rowid, title, description, requirements)
+        VALUES ('delete', old.id, old.title, old.description, old.requirements);
+        INSERT INTO tender_app_tender_fts(rowid, title, description, requirements)
+        VALUES (new.id, new.title, new.description, new.requirements);
+    END
+    """,
+    "INSERT INTO tender_app_tender_fts(tender_app_tender_fts) VALUES('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS tender_app_tender_fts_au",
+    "DROP TRIGGER IF EXISTS tender_app_tender_fts_ad",
+    "DROP TRIGGER IF EXISTS tender_app_tender_fts_ai",
+    "DROP TABLE IF EXISTS tender_app_tender_fts",
+]
+
+# Must stay identical to tender_app.search.search_vector() so the planner can use the index
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX IF NOT EXISTS tender_search_gin ON tender_app_tender USING GIN (
+        to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, '') || ' ' || coalesce(requirements, ''))
+    )
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS tender_search_gin",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tender_app', '0009_tender_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenderSearchEntry',
+            fields=[
+                ('tender', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='tender_app.tender')),
+                ('document', tender_app.models.FullTextDocumentField(db_column='tender_app_tender_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'tender_app_tender_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(
+            run_for_vendor({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run_for_vendor({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-17 18:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tender_app', '0010_tender_full_text_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['tender', 'is_winner'], name='bid_tender_winner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['status', 'submission_deadline'], name='tender_status_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['category', 'submission_deadline'], name='tender_category_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenderhistory',
+            index=models.Index(fields=['tender', '-timestamp'], name='history_tender_time_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.7 on 2026-10-17 18:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_snapshots(apps, schema_editor):
+    """Snapshot the winners of tenders that were awarded before this migration."""
+    Bid = apps.get_model('tender_app', 'Bid')
+    CompanyProfile = apps.get_model('tender_app', 'CompanyProfile')
+    WinnerSnapshot = apps.get_model('tender_app', 'WinnerSnapshot')
+
+    winners = Bid.objects.filter(is_winner=True, tender__status='AWARDED').select_related('tender', 'company')
+    profiles = {profile.user_id: profile for profile in CompanyProfile.objects.all()}
+    snapshots = {}
+    for bid in winners.order_by('awarded_at'):
+        profile = profiles.get(bid.company_id)
+        snapshots[bid.tender_id] = WinnerSnapshot(
+            tender_id=bid.tender_id,
+            bid_id=bid.id,
+            company_name=profile.company_name if profile else bid.company.username,
+            contact_email=profile.contact_email if profile else bid.company.email,
+            phone=profile.phone_number if profile else None,
+            address=profile.address if profile else None,
+            registration_number=profile.registration_number if profile else None,
+            description=profile.description if profile else None,
+            winning_price=bid.bidding_price,
+            award_date=bid.tender.winner_date,
+            submission_date=bid.submission_date,
+        )
+    WinnerSnapshot.objects.bulk_create(snapshots.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tender_app', '0011_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WinnerSnapshot',
+            fields=[
+                ('tender', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='winner_snapshot', serialize=False, to='tender_app.tender')),
+                ('company_name', models.CharField(max_length=255)),
+                ('contact_email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('phone', models.CharField(blank=True, max_length=20, null=True)),
+                ('address', models.TextField(blank=True, null=True)),
+                ('registration_number', models.CharField(blank=True, max_length=50, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('winning_price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('award_date', models.DateTimeField(blank=True, null=True)),
+                ('submission_date', models.DateTimeField()),
+                ('bid', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tender_app.bid')),
+            ],
+        ),
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.7 on 2026-10-17 18:41
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+
+
+def backfill_bid_stats(apps, schema_editor):
+    Bid = apps.get_model('tender_app', 'Bid')
+    Tender = apps.get_model('tender_app', 'Tender')
+    stats = Bid.objects.order_by().values('tender').annotate(
+        count=Count('id'), total=Sum('bidding_price'), low=Min('bidding_price'), high=Max('bidding_price'),
+    )
+    for row in stats:
+        Tender.objects.filter(pk=row['tender']).update(
+            bid_count=row['count'], bid_total_price=row['total'],
+            bid_min_price=row['low'], bid_max_price=row['high'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tender_app', '0012_winnersnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tender',
+            name='bid_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tender',
+            name='bid_max_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='tender',
+            name='bid_min_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='tender',
+            name='bid_total_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15),
+        ),
+        migrations.RunPython(backfill_bid_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-17 18:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tender_app', '0013_tender_bid_stats'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tenderhistory',
+            name='history_tender_time_idx',
+        ),
+        migrations.AddIndex(
+            model_name='tenderhistory',
+            index=models.Index(fields=['tender', 'timestamp', 'id'], name='history_tender_time_id_idx'),
+        ),
+    ]
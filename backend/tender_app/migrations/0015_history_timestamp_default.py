@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-17 18:56
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tender_app', '0014_history_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tenderhistory',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
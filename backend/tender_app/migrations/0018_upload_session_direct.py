@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tender_app', '0017_document_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='direct',
+            field=models.BooleanField(default=False, help_text='Uploaded by the client straight to storage with a presigned URL'),
+        ),
+    ]
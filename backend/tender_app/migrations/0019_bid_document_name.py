@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:26
+
+import os
+
+from django.db import migrations, models
+
+from tender_app.storage import blob_digest
+
+
+def backfill_document_names(apps, schema_editor):
+    # Documents stored by name still carry it; deduplicated ones fall back to a generic name
+    Bid = apps.get_model('tender_app', 'Bid')
+    for bid in Bid.objects.exclude(documents='').only('pk', 'documents').iterator(chunk_size=500):
+        if blob_digest(bid.documents.name) is None:
+            Bid.objects.filter(pk=bid.pk).update(document_name=os.path.basename(bid.documents.name)[:255])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tender_app', '0018_upload_session_direct'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bid',
+            name='document_name',
+            field=models.CharField(blank=True, help_text='File name the document was uploaded as', max_length=255),
+        ),
+        migrations.RunPython(backfill_document_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tender_app', '0019_bid_document_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadpart',
+            name='name',
+            field=models.CharField(blank=True, help_text="Storage name of the part's current copy", max_length=255),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:36
+
+import tender_app.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tender_app', '0020_upload_part_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bid',
+            name='documents',
+            field=models.FileField(max_length=255, storage=tender_app.storage.document_storage, upload_to='bid_documents/'),
+        ),
+    ]
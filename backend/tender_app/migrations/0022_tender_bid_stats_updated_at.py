@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tender_app', '0021_bid_documents_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tender',
+            name='bid_stats_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,7 +1,17 @@
+import os
+import uuid
+
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Case, Count, Exists, F, Max, Min, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.fields.files import FieldFile
 from django.utils import timezone
 
+from .cache import bump_tender_version
+from .storage import blob_digest, document_storage
+
 # Create models here.
 
 class User(AbstractUser):
@@ -34,7 +44,180 @@ class CompanyProfile(models.Model):
     def __str__(self):
         return self.company_name
 
-class Tender(models.Model):
+def tracked_value(value):
+    # A FieldFile is renamed in place by FieldFile.save(), so keep its name instead
+    return value.name if isinstance(value, FieldFile) else value
+
+
+class TrackedFieldsMixin:
+    """
+    Remembers the field values an instance was loaded with, so a save can tell
+    what changed without reading the row again.
+
+    `changed_fields` lists the fields that differ from the loaded values (every
+    field on an unsaved instance), and after each save `saved_changes` maps the
+    fields that save wrote to their (old, new) values.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            attname: value for attname, value in zip(field_names, values) if value is not models.DEFERRED
+        }
+        return instance
+
+    def _tracked_fields(self):
+        return [field for field in self._meta.concrete_fields if not field.primary_key]
+
+    def _snapshot(self, names=None):
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        for field in self._tracked_fields():
+            if (names is None or field.name in names or field.attname in names) and field.attname in self.__dict__:
+                loaded[field.attname] = tracked_value(self.__dict__[field.attname])
+
+    def get_changes(self):
+        """{field name: (loaded value, current value)} for every changed field."""
+        loaded = self.__dict__.get('_loaded_values')
+        changes = {}
+        for field in self._tracked_fields():
+            # Deferred fields that were never loaded or assigned are not in __dict__
+            if field.attname not in self.__dict__:
+                continue
+            current = tracked_value(self.__dict__[field.attname])
+            if loaded is None or self._state.adding:
+                changes[field.name] = (None, current)
+            elif field.attname not in loaded or loaded[field.attname] != current:
+                changes[field.name] = (loaded.get(field.attname), current)
+        return changes
+
+    @property
+    def changed_fields(self):
+        return list(self.get_changes())
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        changes = {} if adding else self.get_changes()
+        if update_fields is not None:
+            changes = {name: change for name, change in changes.items()
+                       if name in update_fields or self._meta.get_field(name).attname in update_fields}
+        super().save(*args, **kwargs)
+        self.saved_changes = changes
+        self._snapshot(update_fields)
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        fields = kwargs.get('fields', args[1] if len(args) > 1 else None)
+        self._snapshot(fields)
+
+
+def history_changes(changes):
+    """
+    The {'field': {'old': ..., 'new': ...}} form of a `saved_changes` dict that
+    is stored in TenderHistory.changes, with dates and decimals as strings.
+    """
+    encoder = DjangoJSONEncoder()
+
+    def encode(value):
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        return encoder.default(value)
+
+    return {name: {'old': encode(old), 'new': encode(new)} for name, (old, new) in changes.items()}
+
+class TenderQuerySet(models.QuerySet):
+    def add_bid_to_stats(self, tender_id, price):
+        """Fold one new bid of `price` into a tender's bid statistics, in a single UPDATE."""
+        price = Value(price, output_field=models.DecimalField(max_digits=12, decimal_places=2))
+        updated = self.filter(pk=tender_id).update(
+            bid_count=F('bid_count') + 1,
+            bid_stats_updated_at=timezone.now(),
+            bid_total_price=F('bid_total_price') + price,
+            bid_min_price=Case(
+                When(Q(bid_min_price__isnull=True) | Q(bid_min_price__gt=price), then=price),
+                default=F('bid_min_price'),
+            ),
+            bid_max_price=Case(
+                When(Q(bid_max_price__isnull=True) | Q(bid_max_price__lt=price), then=price),
+                default=F('bid_max_price'),
+            ),
+        )
+        bump_tender_version(tender_id)
+        return updated
+
+    def refresh_bid_stats(self):
+        """
+        Recompute the bid statistics of every tender in the queryset from its
+        bids, as one set-based UPDATE with correlated subqueries.
+        Callers invalidate the affected cached responses.
+        """
+        bids = Bid.objects.filter(tender=OuterRef('pk')).order_by().values('tender')
+        money = models.DecimalField(max_digits=15, decimal_places=2)
+
+        def aggregate(function):
+            return Subquery(bids.annotate(value=function('bidding_price')).values('value'), output_field=money)
+
+        updated = self.update(
+            bid_count=Coalesce(Subquery(bids.annotate(value=Count('id')).values('value')), 0),
+            bid_total_price=Coalesce(aggregate(Sum), Value(0, output_field=money)),
+            bid_min_price=aggregate(Min),
+            bid_max_price=aggregate(Max),
+            bid_stats_updated_at=timezone.now(),
+        )
+        return updated
+
+    def award(self, bid, performed_by):
+        """
+        Make `bid` the winner of its tender, in one transaction of four writes.
+        Returns the award time, or None if the tender was already awarded.
+
+        The tender row is locked with SELECT ... FOR UPDATE, which also reads
+        the status the history records, then claimed with a conditional UPDATE
+        that re-checks it (SQLite has no row locks), so of two concurrent
+        awards exactly one succeeds.
+        """
+        from .audit import record_history
+
+        awarded_at = timezone.now()
+        with transaction.atomic():
+            unawarded = self.filter(pk=bid.tender_id).exclude(status='AWARDED')
+            old_status = unawarded.select_for_update().values_list('status', flat=True).first()
+            if old_status is None:
+                return None
+            claimed = unawarded.update(status='AWARDED', winning_bid=bid, winner_date=awarded_at)
+            if not claimed:
+                return None
+            # The history below may be written later by the audit writer; the cache cannot wait for it
+            bump_tender_version(bid.tender_id)
+
+            is_this_bid = Q(pk=bid.pk)
+            Bid.objects.filter(tender_id=bid.tender_id).update(
+                is_winner=Case(When(is_this_bid, then=Value(True)), default=Value(False)),
+                awarded_at=Case(When(is_this_bid, then=Value(awarded_at)), default=None),
+            )
+
+            # Upsert, so a tender that was reopened and awarded again replaces its old snapshot
+            snapshot = WinnerSnapshot.from_bid(bid, awarded_at)
+            supports_target = connection.features.supports_update_conflicts_with_target
+            WinnerSnapshot.objects.bulk_create(
+                [snapshot], update_conflicts=True,
+                unique_fields=['tender'] if supports_target else None,
+                update_fields=[field.name for field in WinnerSnapshot._meta.concrete_fields if not field.primary_key],
+            )
+
+            record_history([TenderHistory(
+                tender_id=bid.tender_id,
+                action='UPDATE',
+                changes={"status": {"old": old_status, "new": "AWARDED"}, "winner": {"old": None, "new": bid.pk}},
+                performed_by=performed_by,
+            )])
+
+        bid.is_winner = True
+        bid.awarded_at = awarded_at
+        return awarded_at
+
+class Tender(TrackedFieldsMixin, models.Model):
     CATEGORY_CHOICES = [
         ('CONSTRUCTION', 'Construction'),
         ('INFRASTRUCTURE', 'Infrastructure'),
@@ -71,20 +254,86 @@ class Tender(models.Model):
     # Track the winning bid directly in the Tender model for consistency
     winning_bid = models.ForeignKey('Bid', null=True, blank=True, on_delete=models.SET_NULL, related_name='won_tenders')
 
+    # Bid statistics, maintained by BidViewSet on bid create/update/delete (rebuild with `manage.py rebuild_bid_stats`)
+    bid_count = models.PositiveIntegerField(default=0)
+    bid_total_price = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    bid_min_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    bid_max_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    # Last-Modified of the statistics for conditional GETs, which bids do not otherwise move
+    bid_stats_updated_at = models.DateTimeField(null=True, blank=True)
+
+    BID_STAT_FIELDS = ('bid_count', 'bid_total_price', 'bid_min_price', 'bid_max_price')
+
+    objects = TenderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination walks these (field, id) pairs in either direction
+            models.Index(fields=['created_at', 'id'], name='tender_created_id_idx'),
+            models.Index(fields=['submission_deadline', 'id'], name='tender_deadline_id_idx'),
+            # search filters on status / category, usually together with a deadline range
+            models.Index(fields=['status', 'submission_deadline'], name='tender_status_deadline_idx'),
+            models.Index(fields=['category', 'submission_deadline'], name='tender_category_deadline_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.category})"
         
     def save(self, *args, **kwargs):
         """Ensure consistency between status and winning_bid relationship."""
+        normalized = []
         # If winning_bid is set, ensure status is AWARDED
-        if self.winning_bid is not None and self.status != 'AWARDED':
+        if self.winning_bid_id is not None and self.status != 'AWARDED':
             self.status = 'AWARDED'
-        
+            normalized.append('status')
+
         # If status is not AWARDED, ensure winning_bid is None
-        if self.status != 'AWARDED' and self.winning_bid is not None:
+        if self.status != 'AWARDED' and self.winning_bid_id is not None:
             self.winning_bid = None
-            
+            normalized.append('winning_bid')
+
+        if not self._state.adding and not args:
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                # Write only the columns that changed. Bid statistics are only
+                # written with F() updates, so a tender loaded earlier never
+                # overwrites them with stale values.
+                kwargs['update_fields'] = self.changed_fields
+            elif normalized:
+                kwargs['update_fields'] = list(update_fields) + normalized
+
         super().save(*args, **kwargs)
+        bump_tender_version(self.pk)
+
+class FullTextDocumentField(models.TextField):
+    """
+    The hidden column of an FTS5 table that carries the table's own name.
+    Filtering it with the `match` lookup searches every indexed column.
+    """
+
+@FullTextDocumentField.register_lookup
+class FullTextMatch(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+class TenderSearchEntry(models.Model):
+    """
+    Row of the SQLite FTS5 shadow table over tender title, description and requirements.
+    The table and the triggers that keep it in sync with Tender only exist on SQLite;
+    PostgreSQL searches an expression GIN index instead (see tender_app.search).
+    """
+    tender = models.OneToOneField(Tender, primary_key=True, db_column='rowid',
+                                  on_delete=models.DO_NOTHING, related_name='search_entry')
+    document = FullTextDocumentField(db_column='tender_app_tender_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'tender_app_tender_fts'
 
 class TenderHistory(models.Model):
     """
@@ -107,25 +356,169 @@ class TenderHistory(models.Model):
     changes = models.JSONField(default=dict, blank=True, help_text="JSON representation of the changes made")
     performed_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     user = models.CharField(max_length=255, blank=True, null=True, help_text="User email or identifier")
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Stamped when the row is built, so rows written later by the async audit writer keep the event time
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            # History is always read per tender, in keyset pages over (timestamp, id)
+            models.Index(fields=['tender', 'timestamp', 'id'], name='history_tender_time_id_idx'),
+        ]
     
+    # Fields whose values are shown in a more readable form
+    MONEY_FIELDS = ('budget',)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # History is part of the cached tender detail
+        bump_tender_version(self.tender_id)
+
+    @classmethod
+    def for_update(cls, tender, changes, performed_by):
+        """
+        One unsaved UPDATE row per changed field of `tender`, built from its
+        `saved_changes`, for audit.record_history.
+        """
+        rows = []
+        for name, change in history_changes(changes).items():
+            old_value, new_value = change['old'], change['new']
+            if name in cls.MONEY_FIELDS:
+                old_value = f"€{old_value}" if old_value is not None else None
+                new_value = f"€{new_value}" if new_value is not None else None
+            rows.append(cls(
+                tender=tender,
+                action='UPDATE',
+                field=name,
+                old_value=None if old_value is None else str(old_value),
+                new_value=None if new_value is None else str(new_value),
+                changes={name: change},
+                performed_by=performed_by,
+            ))
+        return rows
+
     def __str__(self):
         user = self.performed_by.username if self.performed_by else self.user
         return f"{self.get_action_display()} for {self.tender.title} by {user}"
 
-class Bid(models.Model):
+class DocumentBlobQuerySet(models.QuerySet):
+    def acquire(self, name):
+        """Count one more bid referencing the stored document `name`."""
+        digest = blob_digest(name)
+        if digest is None:
+            return
+        if self.filter(name=name).update(refcount=F('refcount') + 1):
+            return
+        try:
+            with transaction.atomic():
+                self.create(name=name, digest=digest, size=document_storage().size(name), refcount=1)
+        except IntegrityError:
+            # Another request stored the same document first
+            self.filter(name=name).update(refcount=F('refcount') + 1)
+
+    def release(self, name):
+        """Count one bid fewer referencing `name`, deleting the file after the last one."""
+        if not name:
+            return
+        if blob_digest(name) is None:
+            # Stored by name (a direct upload, or from before deduplication): no count to keep
+            transaction.on_commit(lambda: DocumentBlob.delete_orphan_file(name))
+            return
+        with transaction.atomic():
+            # Locked, so the count read here is the one this update decrements
+            blob = self.select_for_update().filter(name=name).first()
+            if blob is None or not blob.refcount:
+                return
+            self.filter(pk=blob.pk).update(refcount=F('refcount') - 1)
+            if blob.refcount > 1:
+                return
+        # The row stays at zero until the file is gone, so a re-upload meanwhile revives it
+        transaction.on_commit(lambda: DocumentBlob.delete_orphan_file(name))
+
+class DocumentBlob(models.Model):
+    """
+    A bid document stored once under its SHA-256 digest (see tender_app.storage),
+    with the number of bids that reference it.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = DocumentBlobQuerySet.as_manager()
+
+    @staticmethod
+    def delete_orphan_file(name):
+        if blob_digest(name) is None:
+            if not Bid.objects.filter(documents=name).exists():
+                document_storage().delete(name)
+            return
+        with transaction.atomic():
+            # Under the row lock, so a concurrent acquire() waits for the delete instead of racing it
+            blob = DocumentBlob.objects.select_for_update().filter(name=name).first()
+            if blob is not None and blob.refcount > 0:
+                # Uploaded again since it was released
+                return
+            document_storage().delete(name)
+            if blob is not None:
+                blob.delete()
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} bids)"
+
+class BidQuerySet(models.QuerySet):
+    def with_related(self):
+        """Join every relation BidSerializer reads so a list of bids costs one query."""
+        return self.select_related('company__company_profile', 'tender', 'confirmation')
+
+    def with_status(self):
+        """
+        Annotate each bid with `computed_status` (ACCEPTED, REJECTED or PENDING)
+        in the same query, instead of one winner lookup per bid.
+        """
+        tender_has_winner = Exists(
+            Bid.objects.filter(tender=OuterRef('tender'), is_winner=True)
+        )
+        return self.annotate(computed_status=Case(
+            When(is_winner=True, then=Value('ACCEPTED')),
+            When(tender_has_winner, then=Value('REJECTED')),
+            default=Value('PENDING'),
+            output_field=models.CharField(),
+        ))
+
+class Bid(TrackedFieldsMixin, models.Model):
     tender = models.ForeignKey(Tender, on_delete=models.CASCADE, related_name='bids')
     company = models.ForeignKey(User, on_delete=models.CASCADE)
     bidding_price = models.DecimalField(max_digits=12, decimal_places=2)
-    documents = models.FileField(upload_to='bid_documents/')
+    documents = models.FileField(upload_to='bid_documents/', storage=document_storage, max_length=255)
+    document_name = models.CharField(max_length=255, blank=True, help_text="File name the document was uploaded as")
     submission_date = models.DateTimeField(auto_now_add=True)
     is_winner = models.BooleanField(default=False)
     awarded_at = models.DateTimeField(null=True, blank=True)
     additional_notes = models.TextField(blank=True, null=True)
 
+    objects = BidQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Winner lookups per tender, including the status EXISTS subquery
+            models.Index(fields=['tender', 'is_winner'], name='bid_tender_winner_idx'),
+        ]
+
     def __str__(self):
         return f"Bid for {self.tender.title} by {self.company.username}"
 
+    @property
+    def document_filename(self):
+        """The name to download the document as."""
+        if self.document_name:
+            return self.document_name
+        name = self.documents.name
+        # Deduplicated documents are named after their digest, which tells a reader nothing
+        if blob_digest(name) is not None:
+            return 'document' + os.path.splitext(name)[1]
+        return os.path.basename(name)
+
     def save(self, *args, **kwargs):
         """
         Override save method to automatically set awarded_at when bid is marked as winner
@@ -133,16 +526,11 @@ class Bid(models.Model):
         """
         # Track if this is a new instance
         is_new = self._state.adding
-        
-        # If this is an existing bid, fetch the old is_winner value for comparison
+
+        # For an existing bid, compare with the is_winner value it was loaded with
         old_is_winner = None
         if not is_new:
-            try:
-                old_bid = Bid.objects.get(pk=self.pk)
-                old_is_winner = old_bid.is_winner
-            except Bid.DoesNotExist:
-                # This could happen in rare cases
-                old_is_winner = None
+            old_is_winner = self.__dict__.get('_loaded_values', {}).get('is_winner')
         
         # Update awarded_at based on is_winner change
         if self.is_winner:
@@ -155,9 +543,30 @@ class Bid(models.Model):
             if old_is_winner and self.awarded_at is not None:
                 self.awarded_at = None
                 print(f"Clearing awarded_at for bid {self.pk}")
-        
+
+        # A file uploaded just now still has the client's name; storing it renames it
+        if self.documents and not self.documents._committed:
+            self.document_name = os.path.basename(self.documents.name)[:255]
+
+        # Only write the columns that changed
+        if not is_new and kwargs.get('update_fields') is None and not args:
+            kwargs['update_fields'] = self.changed_fields
+
         super(Bid, self).save(*args, **kwargs)
 
+        # Keep the reference counts of deduplicated documents (tender_app.storage)
+        if is_new:
+            DocumentBlob.objects.acquire(self.documents.name)
+        elif 'documents' in self.saved_changes:
+            old_name, new_name = self.saved_changes['documents']
+            DocumentBlob.objects.acquire(new_name)
+            DocumentBlob.objects.release(old_name)
+
+
+def release_bid_document(sender, instance, **kwargs):
+    """post_delete handler: also called for bids deleted along with their tender or company."""
+    DocumentBlob.objects.release(instance.documents.name)
+
 class BidConfirmation(models.Model):
     """
     Track bid confirmations
@@ -168,3 +577,92 @@ class BidConfirmation(models.Model):
     
     def __str__(self):
         return f"Confirmation for bid {self.bid.id}"
+
+class WinnerSnapshot(models.Model):
+    """
+    Denormalized, public view of an awarded tender's winner, written when the
+    winner is selected so the public endpoints read one row instead of joining
+    tender, bid, user and company profile on every request.
+    """
+    tender = models.OneToOneField(Tender, on_delete=models.CASCADE, primary_key=True, related_name='winner_snapshot')
+    bid = models.ForeignKey(Bid, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    company_name = models.CharField(max_length=255)
+    contact_email = models.EmailField(blank=True, null=True)
+    phone = models.CharField(max_length=20, blank=True, null=True)
+    address = models.TextField(blank=True, null=True)
+    registration_number = models.CharField(max_length=50, blank=True, null=True)
+    description = models.TextField(blank=True, null=True)
+    winning_price = models.DecimalField(max_digits=12, decimal_places=2)
+    award_date = models.DateTimeField(null=True, blank=True)
+    submission_date = models.DateTimeField()
+
+    @classmethod
+    def from_bid(cls, bid, award_date):
+        """Build (unsaved) the snapshot for `bid`, falling back to the user when there is no company profile."""
+        try:
+            profile = bid.company.company_profile
+        except CompanyProfile.DoesNotExist:
+            profile = None
+        return cls(
+            tender_id=bid.tender_id,
+            bid=bid,
+            company_name=profile.company_name if profile else bid.company.username,
+            contact_email=profile.contact_email if profile else bid.company.email,
+            phone=profile.phone_number if profile else None,
+            address=profile.address if profile else None,
+            registration_number=profile.registration_number if profile else None,
+            description=profile.description if profile else None,
+            winning_price=bid.bidding_price,
+            award_date=award_date,
+            submission_date=bid.submission_date,
+        )
+
+    def __str__(self):
+        return f"Winner of tender {self.tender_id}: {self.company_name}"
+
+class UploadSession(models.Model):
+    """
+    An upload of one bid document (see tender_app.uploads): either resumable
+    and chunked, with parts stored separately as they arrive and assembled on
+    completion, or direct, with the client sending the whole document to the
+    storage service through a presigned URL.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('COMPLETE', 'Complete'),
+        ('ATTACHED', 'Attached'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField(null=True, blank=True, help_text="Declared size in bytes, checked on completion")
+    bid = models.ForeignKey(Bid, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_sessions',
+                            help_text="Existing bid whose document is replaced on completion")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    file = models.CharField(max_length=255, blank=True, help_text="Storage name of the assembled document")
+    direct = models.BooleanField(default=False, help_text="Uploaded by the client straight to storage with a presigned URL")
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def part_name(self, number):
+        return f'uploads/{self.id}/{number:05d}'
+
+    def __str__(self):
+        return f"Upload {self.id} of {self.filename} ({self.status})"
+
+class UploadPart(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='parts')
+    number = models.PositiveIntegerField()
+    size = models.PositiveBigIntegerField()
+    name = models.CharField(max_length=255, blank=True, help_text="Storage name of the part's current copy")
+    uploaded_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'number'], name='upload_part_session_number_uniq'),
+        ]
+        ordering = ['number']
+
+    def __str__(self):
+        return f"Part {self.number} of upload {self.session_id}"
@@ -0,0 +1,146 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Opaque cursor pagination over a (field, id) keyset.
+
+    Every page is fetched with a WHERE on the last seen (field, id) pair and a
+    LIMIT, so the cost of a page does not depend on how deep the client has
+    scrolled and rows inserted concurrently never shift the pages. Requests
+    that send neither `cursor` nor `page_size` keep the old unpaginated
+    response so existing clients are unaffected.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    page_size = 20
+    max_page_size = 100
+
+    # Fields a client may order by; each one must be backed by a (field, id) index
+    ordering_fields = ()
+    default_ordering = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset)
+        field, descending = self.ordering.lstrip('-'), self.ordering.startswith('-')
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{field}', f'{prefix}id')
+        self.field_name, self.field = field, self.get_field(queryset, field)
+
+        encoded = params.get(self.cursor_query_param)
+        if encoded:
+            value, pk = self.decode_cursor(encoded, self.field)
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{field}__{lookup}': value}) |
+                Q(**{field: value, f'id__{lookup}': pk})
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request, queryset):
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if ordering and ordering.lstrip('-') in self.ordering_fields:
+            return ordering
+        return self.default_ordering
+
+    def get_field(self, queryset, name):
+        # The keyset may also be an annotation, e.g. a search rank
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+    def encode_cursor(self, row):
+        value = getattr(row, self.field_name)
+        payload = {
+            'o': self.ordering,
+            'v': value if isinstance(value, (int, float)) else self.field.value_to_string(row),
+            'i': row.pk,
+        }
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def decode_cursor(self, encoded, field):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            if payload['o'] != self.ordering:
+                raise ValueError('Cursor was issued for a different ordering')
+            return field.to_python(payload['v']), int(payload['i'])
+        except (binascii.Error, UnicodeError, KeyError, TypeError, ValueError) as e:
+            raise NotFound(f'Invalid cursor: {str(e)}')
+
+    def get_next_link(self):
+        if not self.has_next or self.last_row is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last_row))
+        return replace_query_param(url, self.page_size_query_param, self.page_size)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class TenderCursorPagination(KeysetCursorPagination):
+    """
+    Keyset pagination for tender listings, newest first by default.
+    """
+    ordering_fields = ('created_at', 'submission_deadline')
+    default_ordering = '-created_at'
+
+    def get_ordering(self, request, queryset):
+        # Search results are paged best match first, on (search_rank, id), unless
+        # the client asks for another ordering; the rank has no index, so these
+        # pages cost the full match set each
+        if self.ordering_query_param not in request.query_params and 'search_rank' in queryset.query.annotations:
+            return '-search_rank'
+        return super().get_ordering(request, queryset)
+
+
+class TenderHistoryCursorPagination(KeysetCursorPagination):
+    """
+    Keyset pagination for one tender's history, newest first by default.
+    Backed by the (tender, timestamp, id) index.
+    """
+    ordering_fields = ('timestamp',)
+    default_ordering = '-timestamp'
+    page_size = 50
+    max_page_size = 500
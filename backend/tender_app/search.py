@@ -0,0 +1,242 @@
+"""
+Full-text search over tender title, description and requirements.
+
+PostgreSQL matches against an expression GIN index on a tsvector, SQLite against
+the FTS5 shadow table kept in sync by triggers (both created in migration 0010).
+Other databases fall back to the old icontains filter.
+"""
+import re
+from datetime import datetime, timedelta
+
+from django.db import connection
+from django.db.models import BooleanField, Count, F, FloatField, Func, Q, TextField, Value
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Tender
+
+SEARCH_FIELDS = ('title', 'description', 'requirements')
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Triggers that keep the SQLite FTS5 table in sync with tender_app_tender.
+# SQLite migrations that alter the tender table rebuild it and drop its
+# triggers, so they are re-created after every migrate (see apps.py).
+SQLITE_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tender_app_tender_fts_ai AFTER INSERT ON tender_app_tender BEGIN
+        INSERT INTO tender_app_tender_fts(rowid, title, description, requirements)
+        VALUES (new.id, new.title, new.description, new.requirements);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tender_app_tender_fts_ad AFTER DELETE ON tender_app_tender BEGIN
+        INSERT INTO tender_app_tender_fts(tender_app_tender_fts, rowid, title, description, requirements)
+        VALUES ('delete', old.id, old.title, old.description, old.requirements);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tender_app_tender_fts_au
+    AFTER UPDATE OF title, description, requirements ON tender_app_tender BEGIN
+        INSERT INTO tender_app_tender_fts(tender_app_tender_fts, rowid, title, description, requirements)
+        VALUES ('delete', old.id, old.title, old.description, old.requirements);
+        INSERT INTO tender_app_tender_fts(rowid, title, description, requirements)
+        VALUES (new.id, new.title, new.description, new.requirements);
+    END
+    """,
+]
+
+
+def ensure_sqlite_fts_triggers(using='default', **kwargs):
+    """post_migrate handler: restore the FTS triggers if a table rebuild dropped them."""
+    from django.db import connections
+
+    db = connections[using]
+    if db.vendor != 'sqlite' or 'tender_app_tender_fts' not in db.introspection.table_names():
+        return
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'tender_app_tender_fts_%'"
+        )
+        if cursor.fetchone()[0] == len(SQLITE_FTS_TRIGGERS):
+            return
+        for statement in SQLITE_FTS_TRIGGERS:
+            cursor.execute(statement)
+        # Rows written while the triggers were missing are picked up by a rebuild
+        cursor.execute("INSERT INTO tender_app_tender_fts(tender_app_tender_fts) VALUES('rebuild')")
+
+
+def tokenize(term):
+    return TOKEN_RE.findall(term or '')
+
+
+def search_tenders(queryset, term):
+    """
+    Filter `queryset` to tenders matching every word of `term` and annotate each
+    row with `search_rank` (higher is better). The last word is matched as a
+    prefix so results stay useful while the user is still typing.
+    """
+    tokens = tokenize(term)
+    if not tokens:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(queryset, tokens)
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(queryset, tokens)
+    return _search_icontains(queryset, tokens)
+
+
+def search_vector():
+    """
+    The tsvector of a tender, written exactly as the expression indexed by
+    migration 0010 so the planner can use the index. Built from column
+    references rather than raw SQL, so it follows the table alias when the
+    search is used as a subquery.
+    """
+    columns = [Func(F(name), template="coalesce(%(expressions)s, '')", output_field=TextField())
+               for name in SEARCH_FIELDS]
+    return Func(*columns, template="to_tsvector('english', %(expressions)s)", arg_joiner=" || ' ' || ",
+                output_field=TextField())
+
+
+def _search_postgresql(queryset, tokens):
+    query = ' & '.join(tokens[:-1] + [f'{tokens[-1]}:*'])
+    vector = search_vector()
+    tsquery = Func(Value(query), template="to_tsquery('english', %(expressions)s)", output_field=TextField())
+    return queryset.annotate(
+        search_match=Func(vector, tsquery, template='%(expressions)s', arg_joiner=' @@ ', output_field=BooleanField()),
+        search_rank=Func(vector, tsquery, function='ts_rank', output_field=FloatField()),
+    ).filter(search_match=True)
+
+
+def _search_sqlite(queryset, tokens):
+    # Quote every token so user input can never be parsed as FTS5 query syntax
+    phrases = ['"{}"'.format(token.replace('"', '""')) for token in tokens]
+    query = ' '.join(phrases[:-1] + [f'{phrases[-1]}*'])
+    # FTS5 rank is bm25(), where lower means more relevant
+    return queryset.filter(search_entry__document__match=query).annotate(
+        search_rank=-F('search_entry__rank'),
+    )
+
+
+def _search_icontains(queryset, tokens):
+    for token in tokens:
+        queryset = queryset.filter(
+            Q(title__icontains=token) |
+            Q(description__icontains=token) |
+            Q(requirements__icontains=token)
+        )
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def parse_date(value):
+    try:
+        return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
+    except (TypeError, ValueError):
+        return None
+
+
+def filter_tenders(queryset, params):
+    """
+    Apply the search action's query parameters (category, status, deadline_before,
+    deadline_after, search) to a tender queryset.
+    """
+    # Filter by category
+    category = params.get('category')
+    if category:
+        queryset = queryset.filter(category=category)
+
+    # Filter by status
+    status = params.get('status')
+    if status:
+        queryset = queryset.filter(status=status)
+
+    # Filter by deadline (before or after a date); malformed dates are ignored
+    deadline_before = parse_date(params.get('deadline_before'))
+    if deadline_before:
+        queryset = queryset.filter(submission_deadline__lte=deadline_before)
+
+    deadline_after = parse_date(params.get('deadline_after'))
+    if deadline_after:
+        queryset = queryset.filter(submission_deadline__gte=deadline_after)
+
+    # Full-text search over title, description and requirements, best matches first;
+    # a term without any word (e.g. "-" or "...") does not filter
+    term = params.get('search')
+    if tokenize(term):
+        queryset = search_tenders(queryset, term).order_by('-search_rank', '-created_at')
+
+    return queryset
+
+
+def parse_timestamp(value):
+    """An ISO 8601 date-time, or a YYYY-MM-DD date taken as its midnight; None if malformed."""
+    try:
+        parsed = parse_datetime(value or '')
+    except ValueError:
+        return None
+    if parsed is None:
+        return parse_date(value)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_history(queryset, params):
+    """
+    Apply the history endpoints' query parameters (field, action, since, until)
+    to a TenderHistory queryset. Malformed times are ignored.
+    """
+    field = params.get('field')
+    if field:
+        queryset = queryset.filter(field=field)
+
+    action = params.get('action')
+    if action:
+        queryset = queryset.filter(action=action)
+
+    since = parse_timestamp(params.get('since'))
+    if since:
+        queryset = queryset.filter(timestamp__gte=since)
+
+    until = parse_timestamp(params.get('until'))
+    if until:
+        queryset = queryset.filter(timestamp__lt=until)
+
+    return queryset
+
+
+DEADLINE_BUCKETS = [
+    # (name, lower bound, upper bound) as offsets from now; None is unbounded
+    ('passed', None, timedelta(0)),
+    ('next_7_days', timedelta(0), timedelta(days=7)),
+    ('next_30_days', timedelta(days=7), timedelta(days=30)),
+    ('later', timedelta(days=30), None),
+]
+
+
+def facet_counts(queryset):
+    """
+    Count the tenders in `queryset` per category, per status and per deadline
+    bucket. Every count is a filtered COUNT in a single aggregate query.
+    """
+    now = timezone.now()
+    aggregates = {}
+    for code, _ in Tender.CATEGORY_CHOICES:
+        aggregates[f'category:{code}'] = Count('id', filter=Q(category=code))
+    for code, _ in Tender.STATUS_CHOICES:
+        aggregates[f'status:{code}'] = Count('id', filter=Q(status=code))
+    for name, lower, upper in DEADLINE_BUCKETS:
+        condition = Q()
+        if lower is not None:
+            condition &= Q(submission_deadline__gte=now + lower)
+        if upper is not None:
+            condition &= Q(submission_deadline__lt=now + upper)
+        aggregates[f'deadline:{name}'] = Count('id', filter=condition)
+
+    facets = {'category': {}, 'status': {}, 'deadline': {}}
+    for key, count in queryset.order_by().aggregate(**aggregates).items():
+        facet, value = key.split(':', 1)
+        facets[facet][value] = count
+    return facets
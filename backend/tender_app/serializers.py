@@ -1,5 +1,22 @@
+import os
+from decimal import Decimal
+
+from django.urls import reverse
 from rest_framework import serializers
-from .models import User, Tender, Bid, TenderHistory, BidConfirmation, CompanyProfile
+from .models import User, Tender, Bid, TenderHistory, BidConfirmation, CompanyProfile, WinnerSnapshot, UploadSession, UploadPart
+from .uploads import verify_direct_upload
+
+class DynamicFieldsMixin:
+    """
+    Limit the serialized output to the field names passed as `fields` in the
+    serializer context, e.g. from a `?fields=id,title,status` query parameter.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('fields')
+        if requested:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
 
 class CompanyProfileSerializer(serializers.ModelSerializer):
     class Meta:
@@ -34,11 +51,12 @@ class TenderHistorySerializer(serializers.ModelSerializer):
                   'changes', 'performed_by', 'performed_by_username', 'user', 'timestamp']
         read_only_fields = ['timestamp']
 
-class TenderSerializer(serializers.ModelSerializer):
+class TenderSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     history = TenderHistorySerializer(many=True, read_only=True)
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
     category_name = serializers.SerializerMethodField()
     winning_bid_id = serializers.PrimaryKeyRelatedField(source='winning_bid', read_only=True)
+    bid_average_price = serializers.SerializerMethodField()
     
     class Meta:
         model = Tender
@@ -61,9 +79,14 @@ class TenderSerializer(serializers.ModelSerializer):
             'category',
             'category_name',
             'winning_bid',
-            'winning_bid_id'
+            'winning_bid_id',
+            'bid_count',
+            'bid_min_price',
+            'bid_max_price',
+            'bid_average_price'
         ]
-        read_only_fields = ['id', 'created_at', 'winning_bid', 'winning_bid_id']
+        read_only_fields = ['id', 'created_at', 'winning_bid', 'winning_bid_id',
+                            'bid_count', 'bid_min_price', 'bid_max_price']
 
     def get_category_name(self, obj):
         # Get the display name from the CATEGORY_CHOICES
@@ -72,12 +95,47 @@ class TenderSerializer(serializers.ModelSerializer):
                 return name
         return obj.category
 
+    def get_bid_average_price(self, obj):
+        # Derived from the maintained totals, so no aggregate query is needed
+        if not obj.bid_count:
+            return None
+        return str((Decimal(obj.bid_total_price) / obj.bid_count).quantize(Decimal('0.01')))
+
+class TenderListSerializer(TenderSerializer):
+    """
+    Compact tender representation for list and search responses.
+    Leaves out the nested history, which is only sent on retrieve or with ?expand=history.
+    """
+    history = None
+
+    class Meta(TenderSerializer.Meta):
+        fields = [field for field in TenderSerializer.Meta.fields if field != 'history']
+
 class BidConfirmationSerializer(serializers.ModelSerializer):
     class Meta:
         model = BidConfirmation
         fields = ['id', 'bid', 'confirmation_code', 'confirmed_at']
         read_only_fields = ['confirmed_at']
 
+class UploadPartSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadPart
+        fields = ['number', 'size', 'uploaded_at']
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    parts = UploadPartSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'total_size', 'bid', 'status', 'direct', 'file', 'parts', 'created_at', 'completed_at']
+        read_only_fields = ['status', 'direct', 'file', 'created_at', 'completed_at']
+
+    def validate_bid(self, bid):
+        # Only the company that owns a bid may replace its document
+        if bid is not None and bid.company_id != self.context['request'].user.id:
+            raise serializers.ValidationError("You can only upload documents for your own bids.")
+        return bid
+
 class BidSerializer(serializers.ModelSerializer):
     company_name = serializers.CharField(source='company.username', read_only=True)
     tender_title = serializers.CharField(source='tender.title', read_only=True)
@@ -89,18 +147,86 @@ class BidSerializer(serializers.ModelSerializer):
     class Meta:
         model = Bid
         fields = ['id', 'tender', 'tender_id', 'tender_title', 'company', 'company_name', 'company_profile',
-                 'bidding_price', 'documents', 'submission_date', 'is_winner', 'additional_notes', 
-                 'status', 'confirmation']
-        read_only_fields = ['company', 'submission_date', 'is_winner']
+                 'bidding_price', 'documents', 'document_name', 'submission_date', 'is_winner', 'additional_notes', 
+                 'document_url', 'status', 'confirmation', 'upload_id']
+        read_only_fields = ['company', 'document_name', 'submission_date', 'is_winner']
         extra_kwargs = {
-            'tender': {'write_only': True}
+            'tender': {'write_only': True},
+            'documents': {'required': False},
         }
+
+    # A completed chunked or direct upload (see tender_app.uploads) can stand in for the documents file
+    upload_id = serializers.UUIDField(write_only=True, required=False)
+    # Documents are private: they are read through the permission-checked endpoint, not MEDIA_URL
+    document_url = serializers.SerializerMethodField()
+
+    def get_document_url(self, obj):
+        if not obj.documents:
+            return None
+        return reverse('bid-document', args=[obj.pk])
+
+    def validate(self, attrs):
+        upload_id = attrs.pop('upload_id', None)
+        if upload_id is not None:
+            request = self.context.get('request')
+            session = UploadSession.objects.filter(
+                pk=upload_id, owner_id=getattr(request.user, 'id', None), status__in=['PENDING', 'COMPLETE']
+            ).first()
+            # A direct upload is checked against the storage here, so no separate complete call is needed
+            if session is not None and session.status == 'PENDING' and session.direct:
+                try:
+                    verify_direct_upload(session)
+                except serializers.ValidationError as e:
+                    raise serializers.ValidationError({'upload_id': e.detail})
+            if session is None or session.status != 'COMPLETE':
+                raise serializers.ValidationError({'upload_id': "No completed upload with this id."})
+            attrs['documents'] = session.file
+            attrs['document_name'] = os.path.basename(session.filename)
+            attrs['upload_session'] = session
+        elif not self.partial and not attrs.get('documents'):
+            raise serializers.ValidationError({'documents': "Upload a file or pass the upload_id of a completed upload."})
+        return attrs
+
+    def claim_upload(self, validated_data):
+        session = validated_data.pop('upload_session', None)
+        # Conditional update, so a completed upload is attached to one bid only
+        if session is not None and not UploadSession.objects.filter(
+            pk=session.pk, status='COMPLETE'
+        ).update(status='ATTACHED'):
+            raise serializers.ValidationError({'upload_id': "This upload is already attached to a bid."})
+        return session
+
+    def create(self, validated_data):
+        session = self.claim_upload(validated_data)
+        bid = super().create(validated_data)
+        if session is not None:
+            UploadSession.objects.filter(pk=session.pk).update(bid=bid)
+        return bid
+
+    def update(self, instance, validated_data):
+        session = self.claim_upload(validated_data)
+        instance = super().update(instance, validated_data)
+        if session is not None:
+            UploadSession.objects.filter(pk=session.pk).update(bid=instance)
+        return instance
     
     def get_status(self, obj):
+        # Listings annotate the status in SQL, see Bid.objects.with_status()
+        computed_status = getattr(obj, 'computed_status', None)
+        if computed_status is not None:
+            return computed_status
         if obj.is_winner:
             return 'ACCEPTED'
         # If this tender has a winner but it's not this bid
         elif Bid.objects.filter(tender=obj.tender, is_winner=True).exists():
             return 'REJECTED'
         else:
-            return 'PENDING' 
\ No newline at end of file
+            return 'PENDING' 
+
+class WinnerSnapshotSerializer(serializers.ModelSerializer):
+    tender_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = WinnerSnapshot
+        fields = ['tender_id', 'company_name', 'contact_email', 'phone', 'address', 'registration_number',
+                  'description', 'winning_price', 'award_date', 'submission_date']
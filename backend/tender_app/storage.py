@@ -0,0 +1,84 @@
+"""
+Content-addressed storage for bid documents.
+
+Companies attach the same certificates and brochures to every bid. Instead of
+a new file per upload, each upload is hashed with SHA-256 while it is streamed
+to a temporary file and kept once, as <upload_to>/sha256/<ab>/<digest><.ext>;
+uploading a document that is already stored costs no space. DocumentBlob
+counts the bids referencing each stored document, and the file is deleted
+together with the last of them.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.module_loading import import_string
+
+BLOB_NAME_RE = re.compile(r'(?:^|/)sha256/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})(?:\.\w{1,10})?$')
+EXTENSION_RE = re.compile(r'\.\w{1,10}')
+
+
+def blob_digest(name):
+    """The digest a stored name is addressed by, or None for a file stored by name."""
+    match = BLOB_NAME_RE.search(name or '')
+    return match.group('digest') if match else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names every file after the SHA-256 digest of its content."""
+
+    def blob_name(self, name, digest):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        if not EXTENSION_RE.fullmatch(extension):
+            extension = ''
+        return '/'.join(part for part in (directory, 'sha256', digest[:2], digest + extension) if part)
+
+    def get_available_name(self, name, max_length=None):
+        # The name is chosen by _save() from the content; an existing file is the same content
+        return name
+
+    def _save(self, name, content):
+        directory = self.path(os.path.join(os.path.dirname(name), 'sha256'))
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            name = self.blob_name(name, digest.hexdigest())
+            path = self.path(name)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temp_path, self.file_permissions_mode)
+                # Atomic, so a concurrent upload of the same content simply wins the race
+                os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return name
+
+
+_document_storage = None
+
+
+def document_storage():
+    """
+    Storage of Bid.documents, TENDER_DOCUMENT_STORAGE (a dotted class path).
+    A callable, so migrations do not serialize the instance.
+    """
+    global _document_storage
+    if _document_storage is None:
+        _document_storage = import_string(
+            getattr(settings, 'TENDER_DOCUMENT_STORAGE', 'tender_app.storage.ContentAddressedStorage')
+        )()
+    return _document_storage
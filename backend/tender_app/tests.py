@@ -1,3 +1,1321 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import zipfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from . import audit, uploads
+from .models import (
+    User, CompanyProfile, Tender, TenderHistory, Bid, BidConfirmation, WinnerSnapshot, UploadSession, DocumentBlob,
+)
+
+
+def make_tender(user, **kwargs):
+    now = timezone.now()
+    defaults = {
+        'title': 'Tender',
+        'description': 'Description',
+        'budget': 1000,
+        'notice_date': now,
+        'submission_deadline': now + timedelta(days=7),
+        'created_by': user,
+    }
+    defaults.update(kwargs)
+    return Tender.objects.create(**defaults)
+
+
+def make_company(username):
+    company = User.objects.create_user(username=username, user_type='COMPANY')
+    CompanyProfile.objects.create(user=company, company_name=username.title(),
+                                  contact_email=f'{username}@example.com', registration_number='1')
+    return company
+
+
+def make_bid(tender, company, **kwargs):
+    defaults = {'bidding_price': 900, 'documents': 'bid_documents/offer.pdf'}
+    defaults.update(kwargs)
+    bid = Bid.objects.create(tender=tender, company=company, **defaults)
+    BidConfirmation.objects.create(bid=bid, confirmation_code=f'code-{bid.id}')
+    return bid
+
+
+class TenderPaginationTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.client = APIClient()
+        self.tenders = [make_tender(self.city, title=f'Tender {i}') for i in range(5)]
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_unpaginated_list_is_unchanged(self):
+        response = self.client.get('/api/tenders/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 5)
+
+    def test_pages_cover_every_tender_newest_first(self):
+        ids = self.walk('/api/tenders/?page_size=2')
+        self.assertEqual(ids, [t.id for t in reversed(self.tenders)])
+
+    def test_pages_are_stable_under_concurrent_inserts(self):
+        first = self.client.get('/api/tenders/?page_size=2&ordering=created_at')
+        make_tender(self.city, title='Inserted later')
+        ids = [row['id'] for row in first.data['results']] + self.walk(first.data['next'])
+        self.assertEqual(ids[:5], [t.id for t in self.tenders])
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_search_is_paginated(self):
+        self.client.force_authenticate(self.city)
+        ids = self.walk('/api/tenders/search/?page_size=3&ordering=submission_deadline')
+        self.assertEqual(sorted(ids), sorted(t.id for t in self.tenders))
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/tenders/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+
+class TenderRepresentationTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.client = APIClient()
+        self.tender = make_tender(self.city)
+        TenderHistory.objects.create(tender=self.tender, action='CREATE', performed_by=self.city)
+
+    def test_list_leaves_out_history(self):
+        response = self.client.get('/api/tenders/')
+        self.assertNotIn('history', response.data[0])
+        self.assertIn('title', response.data[0])
+
+    def test_list_expands_history_on_request(self):
+        response = self.client.get('/api/tenders/?expand=history')
+        self.assertEqual(len(response.data[0]['history']), 1)
+
+    def test_retrieve_keeps_history(self):
+        response = self.client.get(f'/api/tenders/{self.tender.id}/')
+        self.assertEqual(len(response.data['history']), 1)
+
+    def test_fields_selects_columns(self):
+        response = self.client.get('/api/tenders/?fields=id,title')
+        self.assertEqual(set(response.data[0]), {'id', 'title'})
+
+    def test_fields_does_not_limit_updates(self):
+        self.client.force_authenticate(self.city)
+        response = self.client.patch(f'/api/tenders/{self.tender.id}/?fields=id,status', {'title': 'Renamed'},
+                                     format='json')
+        self.assertEqual(response.status_code, 200)
+        self.tender.refresh_from_db()
+        self.assertEqual(self.tender.title, 'Renamed')
+
+
+NO_CACHE = override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+
+
+@NO_CACHE
+class QueryBudgetTests(TestCase):
+    """
+    Every list endpoint must run in a fixed number of queries, however many rows it returns.
+    The budgets below are upper bounds; growing the dataset must not change the count.
+    """
+
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.company = make_company('acme')
+        self.client = APIClient()
+        self.tender = make_tender(self.city)
+        self.seed(3)
+
+    def seed(self, count):
+        for _ in range(count):
+            tender = make_tender(self.city)
+            TenderHistory.objects.create(tender=tender, action='CREATE', performed_by=self.city)
+            TenderHistory.objects.create(tender=self.tender, action='UPDATE', performed_by=self.city)
+            make_bid(tender, self.company)
+            make_bid(self.tender, make_company(f'bidder{Bid.objects.count()}'))
+
+    def count_queries(self, url, user=None):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return len(queries)
+
+    def assertQueryBudget(self, url, budget, user=None):
+        small = self.count_queries(url, user)
+        self.seed(5)
+        large = self.count_queries(url, user)
+        self.assertEqual(small, large, f'{url} issues queries per row')
+        self.assertLessEqual(large, budget, f'{url} exceeded its query budget')
+
+    def test_tender_list(self):
+        self.assertQueryBudget('/api/tenders/', 1)
+
+    def test_tender_list_with_history(self):
+        self.assertQueryBudget('/api/tenders/?expand=history', 2)
+
+    def test_tender_search(self):
+        self.assertQueryBudget('/api/tenders/search/', 1, self.city)
+
+    def test_tender_retrieve(self):
+        # validators + tender + prefetched history
+        self.assertQueryBudget(f'/api/tenders/{self.tender.id}/', 3)
+
+    def test_tender_history(self):
+        self.assertQueryBudget(f'/api/tenders/{self.tender.id}/history/', 3)
+
+    def test_bid_confirmations(self):
+        self.assertQueryBudget('/api/bid-confirmations/', 1, self.city)
+
+    def test_bid_list(self):
+        self.assertQueryBudget('/api/bids/', 1, self.city)
+
+    def test_my_bids(self):
+        self.assertQueryBudget('/api/bids/my_bids/', 1, self.company)
+
+    def test_tender_bids(self):
+        self.assertQueryBudget(f'/api/tenders/{self.tender.id}/bids/', 2, self.city)
+
+
+class BidStatusTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.tender = make_tender(self.city)
+        self.winner = make_bid(self.tender, make_company('winner'), is_winner=True)
+        self.loser = make_bid(self.tender, make_company('loser'))
+        self.pending = make_bid(make_tender(self.city), make_company('pending'))
+
+    def test_status_is_annotated(self):
+        statuses = dict(Bid.objects.with_status().values_list('id', 'computed_status'))
+        self.assertEqual(statuses, {
+            self.winner.id: 'ACCEPTED',
+            self.loser.id: 'REJECTED',
+            self.pending.id: 'PENDING',
+        })
+
+    def test_endpoint_reports_annotated_status(self):
+        client = APIClient()
+        client.force_authenticate(self.city)
+        response = client.get('/api/bids/')
+        statuses = {row['id']: row['status'] for row in response.data}
+        self.assertEqual(statuses[self.loser.id], 'REJECTED')
+        self.assertEqual(statuses[self.pending.id], 'PENDING')
+
+
+class TenderResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.client = APIClient()
+        self.tender = make_tender(self.city, title='Original')
+        self.other = make_tender(self.city, title='Other')
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def test_repeated_requests_skip_the_database(self):
+        first, _ = self.get('/api/tenders/?fields=id,title')
+        second, queries = self.get('/api/tenders/?fields=id,title')
+        self.assertEqual(first, second)
+        self.assertEqual(queries, 0)
+
+    def test_unrelated_query_parameters_share_the_entry(self):
+        self.get('/api/tenders/?cacheBust=1')
+        _, queries = self.get('/api/tenders/?cacheBust=2')
+        self.assertEqual(queries, 0)
+
+    def test_query_parameters_are_part_of_the_key(self):
+        self.get('/api/tenders/?fields=id')
+        data, queries = self.get('/api/tenders/?fields=title')
+        self.assertGreater(queries, 0)
+        self.assertIn('title', data[0])
+
+    def test_tender_save_invalidates_list_and_its_detail_only(self):
+        url = f'/api/tenders/{self.tender.id}/'
+        other_url = f'/api/tenders/{self.other.id}/'
+        self.get('/api/tenders/')
+        self.get(url)
+        self.get(other_url)
+        self.tender.title = 'Changed'
+        self.tender.save()
+        data, _ = self.get(url)
+        self.assertEqual(data['title'], 'Changed')
+        listing, _ = self.get('/api/tenders/')
+        self.assertIn('Changed', [row['title'] for row in listing])
+        _, queries = self.get(other_url)
+        # only the conditional GET validator query, the body comes from the cache
+        self.assertEqual(queries, 1)
+
+    def test_history_write_invalidates_detail(self):
+        url = f'/api/tenders/{self.tender.id}/'
+        self.get(url)
+        TenderHistory.objects.create(tender=self.tender, action='UPDATE', performed_by=self.city)
+        data, _ = self.get(url)
+        self.assertEqual(len(data['history']), 1)
+
+    @override_settings(TENDER_AUDIT_MODE='async')
+    def test_award_invalidates_detail_before_history_is_written(self):
+        url = f'/api/tenders/{self.tender.id}/'
+        self.get(url)
+        bid = make_bid(self.tender, make_company('acme'))
+        # The queued history row is not written yet when the next request arrives
+        with mock.patch.object(audit, 'get_writer'):
+            Tender.objects.award(bid, self.city)
+        data, _ = self.get(url)
+        self.assertEqual(data['status'], 'AWARDED')
+
+    def test_delete_invalidates_list(self):
+        self.get('/api/tenders/')
+        self.client.force_authenticate(self.city)
+        response = self.client.delete(f'/api/tenders/{self.other.id}/')
+        self.assertEqual(response.status_code, 204)
+        listing, _ = self.get('/api/tenders/')
+        self.assertEqual([row['id'] for row in listing], [self.tender.id])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.client = APIClient()
+        self.tender = make_tender(self.city)
+        TenderHistory.objects.create(tender=self.tender, action='CREATE', performed_by=self.city)
+
+    def test_matching_etag_returns_not_modified(self):
+        url = f'/api/tenders/{self.tender.id}/'
+        first = self.client.get(url)
+        self.assertIn('ETag', first)
+        self.assertIn('Last-Modified', first)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(len(queries), 1)
+
+    def test_if_modified_since(self):
+        url = f'/api/tenders/{self.tender.id}/history/'
+        first = self.client.get(url)
+        second = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(second.status_code, 304)
+
+    def test_new_history_changes_the_validators(self):
+        url = f'/api/tenders/{self.tender.id}/history/'
+        first = self.client.get(url)
+        TenderHistory.objects.create(tender=self.tender, action='UPDATE', performed_by=self.city)
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+    def test_award_changes_winner_validators(self):
+        bid = make_bid(self.tender, make_company('acme'))
+        url = f'/api/public/tenders/{self.tender.id}/winner/'
+        before = self.client.get(url)
+        self.assertEqual(before.status_code, 404)
+        bid.is_winner = True
+        bid.save()
+        self.tender.status = 'AWARDED'
+        self.tender.save()
+        after = self.client.get(url)
+        self.assertEqual(after.status_code, 200)
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=after['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_bid_stats_change_the_validators(self):
+        url = f'/api/tenders/{self.tender.id}/'
+        first = self.client.get(url)
+        # A new bid writes no history, only the tender's bid statistics
+        Tender.objects.add_bid_to_stats(self.tender.id, 500)
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+    def test_bid_stats_move_last_modified(self):
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Tender.objects.filter(pk=self.tender.pk).update(created_at=an_hour_ago)
+        TenderHistory.objects.filter(tender=self.tender).update(timestamp=an_hour_ago)
+        url = f'/api/tenders/{self.tender.id}/'
+        first = self.client.get(url)
+        Tender.objects.add_bid_to_stats(self.tender.id, 500)
+        second = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['bid_count'], 1)
+
+    def test_missing_tender_is_still_404(self):
+        self.assertEqual(self.client.get('/api/tenders/999999/').status_code, 404)
+
+
+class WinnerSnapshotTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.client = APIClient()
+        self.tender = make_tender(self.city)
+        self.bid = make_bid(self.tender, make_company('acme'), bidding_price=750)
+        self.open_tender = make_tender(self.city)
+
+    def award(self, bid):
+        client = APIClient()
+        client.force_authenticate(self.city)
+        response = client.post(f'/api/bids/{bid.id}/select_winner/')
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_select_winner_writes_snapshot(self):
+        self.award(self.bid)
+        snapshot = WinnerSnapshot.objects.get(tender=self.tender)
+        self.assertEqual(snapshot.company_name, 'Acme')
+        self.assertEqual(snapshot.winning_price, 750)
+        self.assertEqual(snapshot.bid_id, self.bid.id)
+
+    def test_award_statements(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.award(self.bid)
+        writes = [q['sql'] for q in queries if not q['sql'].startswith(('SELECT', 'SAVEPOINT', 'RELEASE'))]
+        # claim tender, flip bids, upsert snapshot, insert history
+        self.assertEqual(len(writes), 4, writes)
+        self.bid.refresh_from_db()
+        self.assertTrue(self.bid.is_winner)
+        self.assertEqual(Tender.objects.get(pk=self.tender.pk).winning_bid_id, self.bid.id)
+
+    def test_award_history_records_the_prior_status(self):
+        Tender.objects.filter(pk=self.tender.pk).update(status='CLOSED')
+        Tender.objects.award(self.bid, self.city)
+        history = TenderHistory.objects.get(tender=self.tender)
+        self.assertEqual(history.changes['status'], {'old': 'CLOSED', 'new': 'AWARDED'})
+
+    def test_awarding_twice_is_rejected(self):
+        self.award(self.bid)
+        rival = make_bid(self.tender, make_company('rival'))
+        client = APIClient()
+        client.force_authenticate(self.city)
+        self.assertEqual(client.post(f'/api/bids/{rival.id}/select_winner/').status_code, 400)
+        self.assertEqual(WinnerSnapshot.objects.get(tender=self.tender).bid_id, self.bid.id)
+
+    def test_public_winner_is_one_lookup(self):
+        self.award(self.bid)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/tenders/{self.tender.id}/winner/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['company_name'], 'Acme')
+        self.assertEqual(response.data['contact_email'], 'acme@example.com')
+        # conditional GET validators + snapshot
+        self.assertEqual(len(queries), 2)
+
+    def test_bulk_winners(self):
+        self.award(self.bid)
+        response = self.client.get('/api/public/winners/', {'tender_ids': f'{self.tender.id},{self.open_tender.id}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['tender_id'] for row in response.data], [self.tender.id])
+
+    def test_bulk_winners_rejects_bad_ids(self):
+        response = self.client.get('/api/public/winners/', {'tender_ids': '1,x'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ConcurrentAwardTests(TransactionTestCase):
+    def test_parallel_awards_pick_exactly_one_winner(self):
+        city = User.objects.create_user(username='city', user_type='CITY')
+        tender = make_tender(city)
+        bids = [make_bid(tender, make_company(f'company{i}')) for i in range(4)]
+        barrier = threading.Barrier(len(bids))
+        statuses = []
+
+        def award(bid):
+            client = APIClient()
+            client.force_authenticate(city)
+            barrier.wait()
+            try:
+                statuses.append(client.post(f'/api/bids/{bid.id}/select_winner/').status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=award, args=(bid,)) for bid in bids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses.count(200), 1, statuses)
+        # Shared-cache SQLite fails a concurrent writer with "table is locked" instead of making it wait
+        rejected = {400, 500} if connection.vendor == 'sqlite' else {400}
+        self.assertTrue(set(statuses) - {200} <= rejected, statuses)
+        winners = list(Bid.objects.filter(tender=tender, is_winner=True))
+        self.assertEqual(len(winners), 1)
+        tender.refresh_from_db()
+        self.assertEqual(tender.winning_bid_id, winners[0].id)
+        self.assertEqual(WinnerSnapshot.objects.get(tender=tender).bid_id, winners[0].id)
+        self.assertEqual(TenderHistory.objects.filter(tender=tender).count(), 1)
+
+
+class AuditWriterTests(TransactionTestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.tender = make_tender(self.city)
+        self.spool_path = os.path.join(tempfile.mkdtemp(), 'audit_spool.jsonl')
+
+    def rows(self, count):
+        return [TenderHistory(tender=self.tender, action='UPDATE', field='title', performed_by=self.city)
+                for _ in range(count)]
+
+    def test_writer_inserts_in_batches(self):
+        writer = audit.AuditWriter(batch_size=50, flush_interval=0.01, spool_path=self.spool_path).start()
+        rows = self.rows(120)
+        writer.put(rows)
+        writer.flush()
+        writer.close()
+        stored = TenderHistory.objects.filter(tender=self.tender)
+        self.assertEqual(stored.count(), 120)
+        # Rows keep the time they were recorded, not the time they were flushed
+        self.assertEqual(stored.order_by('timestamp').first().timestamp, rows[0].timestamp)
+
+    def test_failed_writes_are_spooled_and_replayed(self):
+        writer = audit.AuditWriter(flush_interval=0.01, spool_path=self.spool_path)
+        with mock.patch.object(audit, 'write_rows', side_effect=RuntimeError('database is down')):
+            writer.put(self.rows(3))
+            # Rows still queued at shutdown go through the same path
+            writer.close()
+        self.assertEqual(TenderHistory.objects.count(), 0)
+
+        call_command('flush_audit_spool', '--path', self.spool_path, stdout=io.StringIO())
+        self.assertEqual(TenderHistory.objects.filter(tender=self.tender, field='title').count(), 3)
+        self.assertFalse(os.path.exists(self.spool_path))
+
+    @override_settings(TENDER_AUDIT_MODE='async')
+    def test_async_mode_writes_after_the_request(self):
+        client = APIClient()
+        client.force_authenticate(self.city)
+        response = client.patch(f'/api/tenders/{self.tender.id}/', {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        audit.get_writer().flush()
+        self.assertEqual(TenderHistory.objects.get(tender=self.tender).new_value, 'Renamed')
+
+
+class WinnerStatusBatchTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.acme = make_company('acme')
+        self.other = make_company('other')
+        self.tender = make_tender(self.city)
+        self.winner = make_bid(self.tender, self.acme)
+        self.loser = make_bid(self.tender, self.other)
+        self.pending = make_bid(make_tender(self.city), self.acme)
+        client = APIClient()
+        client.force_authenticate(self.city)
+        client.post(f'/api/bids/{self.winner.id}/select_winner/')
+
+    def statuses(self, user, ids):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/bids/winner_status/', {'bid_ids': ','.join(map(str, ids))})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        return {row['bid_id']: row for row in response.data}
+
+    def test_many_bids_in_one_query(self):
+        rows = self.statuses(self.city, [self.winner.id, self.loser.id, self.pending.id, 999999])
+        self.assertEqual(sorted(rows), sorted([self.winner.id, self.loser.id, self.pending.id]))
+        self.assertTrue(rows[self.winner.id]['is_winner'])
+        self.assertTrue(rows[self.winner.id]['is_winning_bid_in_tender'])
+        self.assertIsNotNone(rows[self.winner.id]['awarded_at'])
+        self.assertEqual(rows[self.loser.id]['tender_status'], 'AWARDED')
+        self.assertEqual(rows[self.loser.id]['winning_bid_id'], self.winner.id)
+        self.assertFalse(rows[self.loser.id]['is_winning_bid_in_tender'])
+        self.assertEqual(rows[self.pending.id]['tender_status'], 'OPEN')
+
+    def test_companies_only_see_their_own_bids(self):
+        rows = self.statuses(self.acme, [self.winner.id, self.loser.id])
+        self.assertEqual(list(rows), [self.winner.id])
+
+
+@override_settings(MEDIA_ROOT='/tmp/tender-test-media')
+class BidStatisticsTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.company = make_company('acme')
+        self.tender = make_tender(self.city)
+        self.client = APIClient()
+        self.client.force_authenticate(self.company)
+
+    def submit(self, price):
+        document = SimpleUploadedFile('offer.pdf', b'%PDF-1.4', content_type='application/pdf')
+        response = self.client.post('/api/bids/', {'tender': self.tender.id, 'bidding_price': price,
+                                                   'documents': document}, format='multipart')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data['id']
+
+    def stats(self):
+        response = APIClient().get(f'/api/tenders/{self.tender.id}/')
+        return {key: response.data[key] for key in ('bid_count', 'bid_min_price', 'bid_max_price', 'bid_average_price')}
+
+    def test_stats_follow_price_updates(self):
+        self.submit('100.00')
+        other = self.submit('200.00')
+        response = self.client.patch(f'/api/bids/{other}/', {'bidding_price': '20.00'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.stats()['bid_min_price'], '20.00')
+
+        document = SimpleUploadedFile('offer.pdf', b'%PDF-1.4', content_type='application/pdf')
+        response = self.client.put(f'/api/bids/{other}/', {'tender': self.tender.id, 'bidding_price': '400.00',
+                                                          'documents': document}, format='multipart')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.stats(), {'bid_count': 2, 'bid_min_price': '100.00',
+                                        'bid_max_price': '400.00', 'bid_average_price': '250.00'})
+
+    def test_stats_follow_bid_create_and_delete(self):
+        self.submit('100.00')
+        cheapest = self.submit('50.00')
+        self.submit('300.00')
+        self.assertEqual(self.stats(), {'bid_count': 3, 'bid_min_price': '50.00',
+                                        'bid_max_price': '300.00', 'bid_average_price': '150.00'})
+        self.assertEqual(self.client.delete(f'/api/bids/{cheapest}/').status_code, 204)
+        self.assertEqual(self.stats(), {'bid_count': 2, 'bid_min_price': '100.00',
+                                        'bid_max_price': '300.00', 'bid_average_price': '200.00'})
+
+    def test_tender_save_keeps_stats(self):
+        stale = Tender.objects.get(pk=self.tender.pk)
+        self.submit('100.00')
+        stale.title = 'Renamed'
+        stale.save()
+        self.assertEqual(Tender.objects.get(pk=self.tender.pk).bid_count, 1)
+
+    def test_rebuild_command(self):
+        make_bid(self.tender, self.company, bidding_price=10)
+        make_bid(self.tender, self.company, bidding_price=30)
+        call_command('rebuild_bid_stats', stdout=open('/dev/null', 'w'))
+        self.assertEqual(self.stats(), {'bid_count': 2, 'bid_min_price': '10.00',
+                                        'bid_max_price': '30.00', 'bid_average_price': '20.00'})
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), TENDER_UPLOAD_MAX_PART_SIZE=4)
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.company = make_company('acme')
+        self.tender = make_tender(self.city)
+        self.client = APIClient()
+        self.client.force_authenticate(self.company)
+
+    def start(self, **data):
+        response = self.client.post('/api/uploads/', {'filename': 'offer.pdf', **data}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data['id']
+
+    def put_part(self, upload_id, number, content):
+        return self.client.generic('PUT', f'/api/uploads/{upload_id}/parts/{number}/', content,
+                                   content_type='application/octet-stream')
+
+    def test_upload_parts_out_of_order_then_create_bid(self):
+        upload_id = self.start(total_size=10)
+        self.assertEqual(self.put_part(upload_id, 3, b'89').status_code, 200)
+        self.assertEqual(self.put_part(upload_id, 1, b'0123').status_code, 200)
+        # A retried part replaces the earlier copy
+        self.assertEqual(self.put_part(upload_id, 2, b'xxxx').status_code, 200)
+        self.assertEqual(self.put_part(upload_id, 2, b'4567').status_code, 200)
+        parts = self.client.get(f'/api/uploads/{upload_id}/').data['parts']
+        self.assertEqual([(part['number'], part['size']) for part in parts], [(1, 4), (2, 4), (3, 2)])
+
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['status'], 'COMPLETE')
+
+        response = self.client.post('/api/bids/', {'tender': self.tender.id, 'bidding_price': '500.00',
+                                                   'upload_id': upload_id}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        bid = Bid.objects.get(pk=response.data['id'])
+        with bid.documents.open('rb') as document:
+            self.assertEqual(document.read(), b'0123456789')
+        session = UploadSession.objects.get(pk=upload_id)
+        self.assertEqual((session.status, session.bid_id), ('ATTACHED', bid.id))
+        self.assertFalse(session.parts.exists())
+
+        # The same upload cannot become a second bid's document
+        response = self.client.post('/api/bids/', {'tender': self.tender.id, 'bidding_price': '400.00',
+                                                   'upload_id': upload_id}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_complete_reports_missing_parts(self):
+        upload_id = self.start()
+        self.put_part(upload_id, 1, b'0123')
+        self.put_part(upload_id, 3, b'89')
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['missing_parts'], ['2'])
+
+    def test_short_retry_keeps_the_earlier_copy(self):
+        upload_id = self.start(total_size=4)
+        self.put_part(upload_id, 1, b'0123')
+        session = UploadSession.objects.get(pk=upload_id)
+        # The connection drops after two of four bytes
+        with self.assertRaises(ValidationError):
+            uploads.store_part(session, 1, io.BytesIO(b'45'), 4)
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 200, response.data)
+        with Bid._meta.get_field('documents').storage.open(response.data['file'], 'rb') as document:
+            self.assertEqual(document.read(), b'0123')
+
+    def test_complete_reports_lost_part_files(self):
+        upload_id = self.start()
+        self.put_part(upload_id, 1, b'0123')
+        self.put_part(upload_id, 2, b'45')
+        part = UploadSession.objects.get(pk=upload_id).parts.get(number=2)
+        default_storage.delete(part.name)
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['missing_parts'], ['2'])
+        parts = self.client.get(f'/api/uploads/{upload_id}/').data['parts']
+        self.assertEqual([part['number'] for part in parts], [1])
+
+    def test_oversized_part_is_rejected(self):
+        upload_id = self.start()
+        self.assertEqual(self.put_part(upload_id, 1, b'01234').status_code, 400)
+
+    def test_other_users_cannot_see_upload(self):
+        upload_id = self.start()
+        other = APIClient()
+        other.force_authenticate(make_company('globex'))
+        self.assertEqual(other.get(f'/api/uploads/{upload_id}/').status_code, 404)
+        self.assertEqual(self.put_part(upload_id, 1, b'0123').status_code, 200)
+        self.assertEqual(other.generic('PUT', f'/api/uploads/{upload_id}/parts/2/', b'45',
+                                       content_type='application/octet-stream').status_code, 404)
+
+    def test_upload_for_existing_bid_replaces_document(self):
+        bid = make_bid(self.tender, self.company)
+        upload_id = self.start(bid=bid.id)
+        self.put_part(upload_id, 1, b'new')
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.data['status'], 'ATTACHED')
+        bid.refresh_from_db()
+        self.assertEqual(bid.documents.name, response.data['file'])
+
+        other_bid = make_bid(self.tender, make_company('globex'))
+        response = self.client.post('/api/uploads/', {'filename': 'x.pdf', 'bid': other_bid.id}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+    def test_direct_upload_through_local_stand_in(self):
+        response = self.client.post('/api/uploads/direct/', {'filename': 'offer.pdf', 'total_size': 10,
+                                                              'content_type': 'application/pdf'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        upload_id, upload = response.data['id'], response.data['upload']
+        self.assertEqual((upload['method'], upload['headers']), ('PUT', {'Content-Type': 'application/pdf'}))
+
+        # Creating the bid before the document arrived fails the storage check
+        bid_data = {'tender': self.tender.id, 'bidding_price': '500.00', 'upload_id': upload_id}
+        self.assertEqual(self.client.post('/api/bids/', bid_data, format='json').status_code, 400)
+
+        # The presigned URL needs no credentials, only its signature
+        response = APIClient().generic('PUT', upload['url'], b'0123456789', content_type='application/pdf')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post('/api/bids/', bid_data, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        bid = Bid.objects.get(pk=response.data['id'])
+        self.assertEqual(bid.documents.name, f'bid_documents/direct/{upload_id}/offer.pdf')
+        self.assertEqual(bid.document_name, 'offer.pdf')
+        with bid.documents.open('rb') as document:
+            self.assertEqual(document.read(), b'0123456789')
+
+        # Once verified, the URL cannot overwrite the attached document
+        response = APIClient().generic('PUT', upload['url'], b'9876543210', content_type='application/pdf')
+        self.assertEqual(response.status_code, 403)
+
+        storage = bid.documents.storage
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/bids/{bid.id}/')
+        self.assertFalse(storage.exists(f'bid_documents/direct/{upload_id}/offer.pdf'))
+
+    def test_long_file_names_are_shortened_to_fit(self):
+        filename = 'Company_Tender_Submission_Final_Version_' + 'x' * 200 + '.pdf'
+        response = self.client.post('/api/uploads/direct/', {'filename': filename, 'total_size': 10}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        name = UploadSession.objects.get(pk=response.data['id']).file
+        self.assertLessEqual(len(name), Bid._meta.get_field('documents').max_length)
+        self.assertTrue(name.endswith('.pdf'))
+
+    def test_abandoned_direct_upload_is_deleted_with_its_session(self):
+        response = self.client.post('/api/uploads/direct/', {'filename': 'offer.pdf', 'total_size': 10}, format='json')
+        upload_id = response.data['id']
+        self.assertEqual(APIClient().generic('PUT', response.data['upload']['url'], b'0123456789').status_code, 200)
+        name = UploadSession.objects.get(pk=upload_id).file
+        storage = Bid._meta.get_field('documents').storage
+        self.assertTrue(storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(f'/api/uploads/{upload_id}/').status_code, 204)
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(UploadSession.objects.filter(pk=upload_id).exists())
+
+    def test_direct_upload_size_and_expiry_are_checked(self):
+        response = self.client.post('/api/uploads/direct/', {'filename': 'offer.pdf', 'total_size': 10}, format='json')
+        upload_id, url = response.data['id'], response.data['upload']['url']
+        self.assertEqual(APIClient().generic('PUT', url, b'0' * 11).status_code, 400)
+        self.assertEqual(APIClient().generic('PUT', url, b'01234').status_code, 200)
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('10 were declared', response.data['detail'])
+
+        with override_settings(TENDER_UPLOAD_DIRECT_EXPIRES=-1):
+            self.assertEqual(APIClient().generic('PUT', url, b'0123456789').status_code, 403)
+        self.assertEqual(self.client.post('/api/uploads/direct/', {'filename': 'x.pdf'}, format='json').status_code, 400)
+
+
+DOCUMENT_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=DOCUMENT_MEDIA_ROOT)
+class DocumentDownloadTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.company = make_company('acme')
+        tender = make_tender(self.city)
+        self.bid = make_bid(tender, self.company, documents=None)
+        self.bid.documents.save('offer.pdf', ContentFile(b'0123456789'))
+        self.url = f'/api/bids/{self.bid.id}/document/'
+        self.client = APIClient()
+        self.client.force_authenticate(self.company)
+
+    def test_full_and_ranged_download(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_serialized_document_url(self):
+        response = self.client.get(f'/api/bids/{self.bid.id}/')
+        self.assertEqual(response.data['document_url'], self.url)
+        self.assertEqual(self.client.get(response.data['document_url']).status_code, 200)
+
+    def test_conditional_requests(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # A stale If-Range validator gets the whole file instead of the range
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+    def test_only_city_and_owner_can_download(self):
+        other = APIClient()
+        other.force_authenticate(make_company('globex'))
+        self.assertEqual(other.get(self.url).status_code, 404)
+        self.assertEqual(APIClient().get(self.url).status_code, 401)
+        city = APIClient()
+        city.force_authenticate(self.city)
+        self.assertEqual(city.get(self.url).status_code, 200)
+
+    def test_tender_document_bundle(self):
+        other = make_bid(self.bid.tender, make_company('globex'), documents=None, bidding_price=700)
+        large = os.urandom(300 * 1024)
+        other.document_name = 'Site plans.pdf'
+        other.documents.save('plans.pdf', ContentFile(large))
+        make_bid(self.bid.tender, make_company('initech'), documents='bid_documents/missing.pdf')
+        city = APIClient()
+        city.force_authenticate(self.city)
+        url = f'/api/tenders/{self.bid.tender_id}/documents/'
+
+        response = city.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        chunks = list(response.streaming_content)
+        # Streamed in blocks, never as a whole bundle
+        self.assertLess(max(len(chunk) for chunk in chunks), 128 * 1024)
+
+        bundle = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+        self.assertEqual(bundle.read(f'{self.bid.id}-acme/document.pdf'), b'0123456789')
+        self.assertEqual(bundle.read(f'{other.id}-globex/Site plans.pdf'), large)
+        self.assertTrue(all(info.compress_type == zipfile.ZIP_STORED for info in bundle.infolist()))
+        manifest = list(csv.DictReader(io.StringIO(bundle.read('manifest.csv').decode())))
+        self.assertEqual([(row['company'], row['bidding_price'], row['document']) for row in manifest], [
+            ('acme', '900.00', f'{self.bid.id}-acme/document.pdf'),
+            ('globex', '700.00', f'{other.id}-globex/Site plans.pdf'),
+            ('initech', '900.00', ''),
+        ])
+
+        # Evaluators only: companies cannot fetch their competitors' documents
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    @override_settings(TENDER_DOCUMENT_OFFLOAD='x-accel-redirect')
+    def test_offloaded_to_front_server(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.bid.documents.name}')
+        self.assertEqual(response.content, b'')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class DocumentDeduplicationTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.company = make_company('acme')
+        self.tender = make_tender(self.city)
+        self.client = APIClient()
+        self.client.force_authenticate(self.company)
+
+    def submit(self, content, filename='brochure.pdf', tender=None):
+        document = SimpleUploadedFile(filename, content, content_type='application/pdf')
+        response = self.client.post('/api/bids/', {'tender': (tender or self.tender).id, 'bidding_price': '100.00',
+                                                   'documents': document}, format='multipart')
+        self.assertEqual(response.status_code, 201, response.data)
+        return Bid.objects.get(pk=response.data['id'])
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.submit(b'same brochure')
+        second = self.submit(b'same brochure', filename='copy.PDF', tender=make_tender(self.city))
+        other = self.submit(b'another document')
+        self.assertEqual(first.documents.name, second.documents.name)
+        self.assertNotEqual(first.documents.name, other.documents.name)
+        self.assertTrue(first.documents.name.endswith('.pdf'))
+        self.assertEqual(DocumentBlob.objects.get(name=first.documents.name).refcount, 2)
+        path = first.documents.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(f'/api/bids/{first.id}/').status_code, 204)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(DocumentBlob.objects.get(name=second.documents.name).refcount, 1)
+
+        # Deleting the tender deletes its bids, and the last reference with them
+        with self.captureOnCommitCallbacks(execute=True):
+            second.tender.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(DocumentBlob.objects.filter(name=second.documents.name).exists())
+
+    def test_downloads_keep_the_uploaded_name(self):
+        first = self.submit(b'same brochure', filename='Company brochure.pdf')
+        second = self.submit(b'same brochure', filename='copy.pdf', tender=make_tender(self.city))
+        self.assertEqual(first.documents.name, second.documents.name)
+        response = self.client.get(f'/api/bids/{first.id}/document/')
+        self.assertEqual(response['Content-Disposition'], 'inline; filename="Company brochure.pdf"')
+        response = self.client.get(f'/api/bids/{second.id}/document/')
+        self.assertEqual(response['Content-Disposition'], 'inline; filename="copy.pdf"')
+
+    def test_reupload_before_the_orphan_delete_keeps_the_file(self):
+        bid = self.submit(b'draft offer')
+        name, path = bid.documents.name, bid.documents.path
+        with self.captureOnCommitCallbacks() as callbacks:
+            bid.delete()
+        # The same content is uploaded again before the delete scheduled on commit runs
+        self.submit(b'draft offer')
+        for callback in callbacks:
+            callback()
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(DocumentBlob.objects.get(name=name).refcount, 1)
+
+    def test_replacing_a_document_releases_the_old_blob(self):
+        bid = self.submit(b'draft offer')
+        old_path = bid.documents.path
+        with self.captureOnCommitCallbacks(execute=True):
+            bid.documents.save('offer.pdf', ContentFile(b'final offer'))
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(list(DocumentBlob.objects.values_list('name', 'refcount')), [(bid.documents.name, 1)])
+
+    def test_dedupe_command_moves_legacy_documents(self):
+        storage = Bid._meta.get_field('documents').storage
+        for name in ('bid_documents/a.pdf', 'bid_documents/b.pdf'):
+            os.makedirs(os.path.dirname(storage.path(name)), exist_ok=True)
+            with open(storage.path(name), 'wb') as legacy_file:
+                legacy_file.write(b'certificate')
+        make_bid(self.tender, self.company, documents='bid_documents/a.pdf')
+        make_bid(self.tender, self.company, documents='bid_documents/b.pdf')
+
+        call_command('dedupe_bid_documents', stdout=io.StringIO())
+        names = set(Bid.objects.values_list('documents', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertEqual(DocumentBlob.objects.get(name=names.pop()).refcount, 2)
+        self.assertFalse(storage.exists('bid_documents/a.pdf'))
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.acme = make_company('acme')
+        self.other = make_company('other')
+        self.road = make_tender(self.city, title='Road repair', category='CONSTRUCTION')
+        self.park = make_tender(self.city, title='Park design', category='SERVICES')
+        make_bid(self.road, self.acme)
+        make_bid(self.park, self.other)
+        self.client = APIClient()
+        self.client.force_authenticate(self.city)
+
+    def body(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_export_streams_filtered_tenders(self):
+        response = self.client.get('/api/tenders/export/?category=CONSTRUCTION')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="tenders.csv"')
+        rows = list(csv.DictReader(io.StringIO(self.body(response))))
+        self.assertEqual([row['title'] for row in rows], ['Road repair'])
+        self.assertEqual(rows[0]['created_by__username'], 'city')
+
+    def test_ndjson_history_export(self):
+        TenderHistory.objects.create(tender=self.road, action='UPDATE', field='title', performed_by=self.city)
+        TenderHistory.objects.create(tender=self.park, action='UPDATE', field='title', performed_by=self.city)
+        response = self.client.get('/api/tenders/export/history/?export_format=ndjson&category=CONSTRUCTION')
+        lines = [json.loads(line) for line in self.body(response).splitlines()]
+        self.assertEqual([(line['tender_id'], line['performed_by__username']) for line in lines],
+                         [(self.road.id, 'city')])
+
+    def test_bid_export_is_scoped_to_the_company(self):
+        client = APIClient()
+        client.force_authenticate(self.acme)
+        rows = list(csv.DictReader(io.StringIO(self.body(client.get('/api/bids/export/')))))
+        self.assertEqual([row['company__username'] for row in rows], ['acme'])
+
+    def test_unknown_format_is_rejected(self):
+        self.assertEqual(self.client.get('/api/tenders/export/?export_format=xml').status_code, 400)
+
+    def test_export_command(self):
+        out = io.StringIO()
+        call_command('export_data', 'bids', '--export-format', 'ndjson', '--category', 'SERVICES', stdout=out)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([line['tender_id'] for line in lines], [self.park.id])
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.client = APIClient()
+        self.client.force_authenticate(self.city)
+
+    def row(self, i):
+        now = timezone.now()
+        return {'title': f'Imported {i}', 'description': 'Legacy tender', 'budget': '1000.00',
+                'notice_date': now.isoformat(), 'submission_deadline': (now + timedelta(days=7)).isoformat()}
+
+    def test_valid_rows_are_created_and_errors_reported(self):
+        rows = [self.row(0), {'title': 'Missing fields'}, self.row(2)]
+        response = self.client.post('/api/tenders/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+        self.assertIn('budget', response.data['errors'][0]['errors'])
+        tenders = Tender.objects.filter(pk__in=response.data['ids'])
+        self.assertEqual(sorted(t.title for t in tenders), ['Imported 0', 'Imported 2'])
+        self.assertTrue(all(t.created_by_id == self.city.id for t in tenders))
+        self.assertEqual(TenderHistory.objects.filter(tender__in=tenders, action='CREATE').count(), 2)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/tenders/bulk/', {'tenders': [self.row(i) for i in range(50)]},
+                                        format='json')
+        self.assertEqual(response.data['created'], 50)
+        self.assertLess(len(queries), 10)
+
+    def test_company_users_cannot_import(self):
+        client = APIClient()
+        client.force_authenticate(make_company('acme'))
+        self.assertEqual(client.post('/api/tenders/bulk/', [self.row(0)], format='json').status_code, 403)
+
+    def test_import_command_reads_an_export(self):
+        make_tender(self.city, title='Exported')
+        exported = io.StringIO()
+        call_command('export_data', 'tenders', '--export-format', 'ndjson', stdout=exported)
+        with open('/tmp/tender-import-test.ndjson', 'w') as f:
+            f.write(exported.getvalue())
+        call_command('import_tenders', '/tmp/tender-import-test.ndjson', '--user', 'city', stdout=io.StringIO())
+        self.assertEqual(Tender.objects.filter(title='Exported').count(), 2)
+
+
+class ChangeTrackingTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        tender = make_tender(self.city, title='Bridge')
+        make_bid(tender, make_company('acme'))
+        self.tender = Tender.objects.get(pk=tender.pk)
+        self.bid = Bid.objects.get(tender=tender)
+
+    def test_changed_fields(self):
+        self.assertEqual(self.tender.changed_fields, [])
+        self.tender.title = 'Tunnel'
+        self.tender.budget = self.tender.budget
+        self.assertEqual(self.tender.changed_fields, ['title'])
+
+    def test_save_writes_only_changed_columns_without_reading(self):
+        self.bid.is_winner = True
+        with CaptureQueriesContext(connection) as queries:
+            self.bid.save()
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"is_winner"', queries[0]['sql'])
+        self.assertIn('"awarded_at"', queries[0]['sql'])
+        self.assertNotIn('"bidding_price"', queries[0]['sql'])
+        self.assertEqual(self.bid.changed_fields, [])
+
+    def test_unchanged_save_is_skipped(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.tender.save()
+        self.assertEqual(len(queries), 0)
+
+    def test_update_history_comes_from_the_model(self):
+        client = APIClient()
+        client.force_authenticate(self.city)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.patch(f'/api/tenders/{self.tender.id}/', {'title': 'Tunnel', 'budget': '2000.00'},
+                                    format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        inserts = [q['sql'] for q in queries if q['sql'].startswith('INSERT INTO "tender_app_tenderhistory"')]
+        self.assertEqual(len(inserts), 1)
+
+        rows = {row.field: row for row in TenderHistory.objects.filter(tender=self.tender, action='UPDATE')}
+        self.assertEqual(sorted(rows), ['budget', 'title'])
+        self.assertEqual((rows['title'].old_value, rows['title'].new_value), ('Bridge', 'Tunnel'))
+        self.assertEqual((rows['budget'].old_value, rows['budget'].new_value), ('€1000.00', '€2000.00'))
+        self.assertEqual(rows['budget'].changes, {'budget': {'old': '1000.00', 'new': '2000.00'}})
+        # The response includes the new history
+        self.assertEqual(len([h for h in response.data['history'] if h['action'] == 'UPDATE']), 2)
+
+
+class TenderHistoryPaginationTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.tender = make_tender(self.city)
+        start = timezone.now() - timedelta(days=10)
+        TenderHistory.objects.bulk_create([
+            TenderHistory(tender=self.tender, action='UPDATE', field='title' if i % 2 else 'budget',
+                          performed_by=self.city)
+            for i in range(10)
+        ])
+        # auto_now_add stamps every row alike; spread them one day apart
+        for day, history in enumerate(TenderHistory.objects.filter(tender=self.tender).order_by('id')):
+            TenderHistory.objects.filter(pk=history.pk).update(timestamp=start + timedelta(days=day))
+        self.url = f'/api/tenders/{self.tender.id}/history/'
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_pages_cover_history_newest_first(self):
+        expected = list(TenderHistory.objects.filter(tender=self.tender)
+                        .order_by('-timestamp', '-id').values_list('id', flat=True))
+        self.assertEqual(self.walk(self.url + '?page_size=3'), expected)
+
+    def test_page_size_and_action_filter(self):
+        response = self.client.get(self.url, {'page_size': 4, 'action': 'UPDATE'})
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(self.client.get(self.url, {'action': 'DELETE'}).data, [])
+
+    def test_filters(self):
+        since = (timezone.now() - timedelta(days=5)).date().isoformat()
+        response = self.client.get(self.url, {'field': 'title', 'since': since})
+        rows = TenderHistory.objects.filter(tender=self.tender, field='title', timestamp__gte=since)
+        self.assertEqual(sorted(row['id'] for row in response.data), sorted(rows.values_list('id', flat=True)))
+        self.assertTrue(all(row['field'] == 'title' for row in response.data))
+
+    def test_empty_history_has_no_sample_records(self):
+        tender = make_tender(self.city)
+        self.assertEqual(self.client.get(f'/api/tenders/{tender.id}/history/').data, [])
+
+    def test_bad_cursor_is_not_found(self):
+        self.assertEqual(self.client.get(self.url + '?cursor=bogus').status_code, 404)
+
+
+class TenderSearchTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.client = APIClient()
+        self.client.force_authenticate(self.city)
+        self.bridge = make_tender(self.city, title='Bridge repair', description='Steel works')
+        self.park = make_tender(self.city, title='City park', description='Planting near the bridge')
+        self.school = make_tender(self.city, title='School roof', requirements='Certified bridge inspector')
+
+    def search(self, term):
+        response = self.client.get('/api/tenders/search/', {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data]
+
+    def test_matches_title_description_and_requirements(self):
+        ids = self.search('bridge')
+        self.assertEqual(sorted(ids), sorted([self.bridge.id, self.park.id, self.school.id]))
+        self.assertEqual(ids[0], self.bridge.id)
+
+    def test_last_word_matches_as_prefix(self):
+        self.assertEqual(self.search('steel wor'), [self.bridge.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.park.title = 'City garden'
+        self.park.description = 'Flowers'
+        self.park.save()
+        self.school.delete()
+        self.assertEqual(self.search('bridge'), [self.bridge.id])
+        self.assertEqual(self.search('garden'), [self.park.id])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('"bridge" OR NEAR('), [])
+
+    def test_term_without_words_does_not_filter(self):
+        for term in ('-', '?', '...', '"*'):
+            self.assertEqual(len(self.search(term)), 3)
+
+    def test_pages_keep_rank_order(self):
+        ranked = self.search('bridge')
+        ids, url = [], '/api/tenders/search/?search=bridge&page_size=1'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(ids, ranked)
+
+
+class TenderFacetTests(TestCase):
+    def setUp(self):
+        self.city = User.objects.create_user(username='city', user_type='CITY')
+        self.client = APIClient()
+        self.client.force_authenticate(self.city)
+        now = timezone.now()
+        make_tender(self.city, category='HEALTHCARE', submission_deadline=now + timedelta(days=2))
+        make_tender(self.city, category='HEALTHCARE', status='CLOSED', submission_deadline=now - timedelta(days=1))
+        make_tender(self.city, category='EDUCATION', submission_deadline=now + timedelta(days=60))
+
+    def test_facets_come_from_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tenders/search/?facets=true&page_size=1')
+        facets = response.data['facets']
+        self.assertEqual(facets['category']['HEALTHCARE'], 2)
+        self.assertEqual(facets['category']['EDUCATION'], 1)
+        self.assertEqual(facets['status'], {'OPEN': 2, 'CLOSED': 1, 'AWARDED': 0})
+        self.assertEqual(facets['deadline'], {'passed': 1, 'next_7_days': 1, 'next_30_days': 0, 'later': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        # one aggregate query plus one page query
+        self.assertEqual(len(queries), 2)
+
+    def test_facets_follow_filters(self):
+        response = self.client.get('/api/tenders/search/?facets=1&category=HEALTHCARE')
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['facets']['category']['EDUCATION'], 0)
+
+    def test_plain_search_response_is_unchanged(self):
+        response = self.client.get('/api/tenders/search/')
+        self.assertEqual(len(response.data), 3)
+
+
+@NO_CACHE
+class QueryPlanTests(TestCase):
+    """
+    Seed a dataset large enough for the planner to prefer indexes, then EXPLAIN
+    every SELECT an endpoint issues and fail on a full scan of an app table.
+    Endpoints that return a whole table by design (the unpaginated lists) are not covered.
+    """
+    TENDERS = 2000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.city = User.objects.create_user(username='city', user_type='CITY')
+        cls.company = make_company('acme')
+        others = [make_company(f'other{i}') for i in range(5)]
+        now = timezone.now()
+        categories = [code for code, _ in Tender.CATEGORY_CHOICES]
+        statuses = [code for code, _ in Tender.STATUS_CHOICES]
+        Tender.objects.bulk_create([
+            Tender(title=f'Tender {i}', description='Description', budget=1000,
+                   category=categories[i % len(categories)], status=statuses[i % len(statuses)],
+                   notice_date=now, submission_deadline=now + timedelta(hours=i), created_by=cls.city)
+            for i in range(cls.TENDERS)
+        ])
+        tenders = list(Tender.objects.all())
+        Bid.objects.bulk_create([
+            Bid(tender=tender, company=company, bidding_price=900, documents='bid_documents/offer.pdf')
+            for tender in tenders for company in others
+        ] + [Bid(tender=tenders[0], company=cls.company, bidding_price=900, documents='bid_documents/offer.pdf')])
+        BidConfirmation.objects.bulk_create([
+            BidConfirmation(bid=bid, confirmation_code=f'code-{bid.id}') for bid in Bid.objects.all()
+        ])
+        TenderHistory.objects.bulk_create([
+            TenderHistory(tender=tender, action='UPDATE', performed_by=cls.city) for tender in tenders for _ in range(3)
+        ])
+        cls.tender = tenders[0]
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                return [row[-1] for row in cursor.fetchall()]
+            cursor.execute(f'EXPLAIN {sql}', params)
+            return [' '.join(str(col) for col in row) for row in cursor.fetchall()]
+
+    def full_scans(self, plan):
+        if connection.vendor == 'sqlite':
+            pattern = re.compile(r'^SCAN (tender_app_\w+)$')
+        elif connection.vendor == 'postgresql':
+            pattern = re.compile(r'Seq Scan on (tender_app_\w+)')
+        else:
+            pattern = re.compile(r'(tender_app_\w+) .*\bALL\b')
+        return [match.group(1) for line in plan for match in [pattern.search(line.strip())] if match]
+
+    def assertIndexedPlans(self, url, user=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        for query in captured.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            # captured SQL has parameters inlined, which is fine for EXPLAIN
+            scans = self.full_scans(self.explain(sql, ()))
+            self.assertEqual(scans, [], f'{url} scans a whole table:\n{sql}')
+
+    def test_tender_keyset_page(self):
+        self.assertIndexedPlans('/api/tenders/?page_size=20&ordering=submission_deadline')
+
+    def test_search_by_status(self):
+        self.assertIndexedPlans('/api/tenders/search/?status=OPEN&page_size=20&ordering=submission_deadline', self.city)
+
+    def test_search_by_category(self):
+        self.assertIndexedPlans('/api/tenders/search/?category=HEALTHCARE', self.city)
+
+    def test_tender_history(self):
+        self.assertIndexedPlans(f'/api/tenders/{self.tender.id}/history/')
+
+    def test_tender_history_page(self):
+        self.assertIndexedPlans(f'/api/tenders/{self.tender.id}/history/?page_size=2&action=UPDATE')
+
+    def test_tender_bids(self):
+        self.assertIndexedPlans(f'/api/tenders/{self.tender.id}/bids/', self.city)
+
+    def test_my_bids(self):
+        self.assertIndexedPlans('/api/bids/my_bids/', self.company)
+
+    def test_my_confirmations(self):
+        self.assertIndexedPlans('/api/bid-confirmations/my_confirmations/', self.company)
@@ -0,0 +1,285 @@
+"""
+Resumable chunked uploads and direct (presigned) uploads of bid documents.
+
+A client initiates an UploadSession, PUTs numbered parts in any order (and
+again after a dropped connection; GET on the session lists what arrived), then
+completes it. Each part is read from the request straight into the storage
+backend and the parts are assembled by streaming them back out into the final
+document, so memory use is bounded by the storage chunk size, never by the
+part or document size.
+
+A direct upload skips the application servers altogether: the API hands out a
+short-lived URL that can only PUT the session's own storage key, the client
+sends the document to the storage service, and the session is completed once
+an object of the declared size exists under that key. Storages that cannot
+presign URLs (the default filesystem storage) get a local stand-in, a signed
+URL served by LocalUploadView, so the same flow works in development and tests.
+"""
+import os
+import shutil
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from .models import Bid, DocumentBlob, UploadPart, UploadSession
+
+LOCAL_UPLOAD_SALT = 'tender_app.uploads.local'
+
+
+def upload_setting(name, default):
+    return getattr(settings, f'TENDER_UPLOAD_{name}', default)
+
+
+class LimitedReader:
+    """Read at most `size` bytes from a stream, counting what was actually read."""
+
+    def __init__(self, stream, size):
+        self.stream = stream
+        self.size = size
+        self.remaining = size
+        self.read_bytes = 0
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        self.read_bytes += len(data)
+        return data
+
+
+class PartsReader:
+    """File-like object that reads stored parts back to back, one open part at a time."""
+
+    def __init__(self, storage, names, size):
+        self.storage = storage
+        self.names = list(names)
+        self.size = size
+        self.current = None
+
+    def read(self, size=-1):
+        chunks = []
+        while size is None or size < 0 or size > 0:
+            if self.current is None:
+                if not self.names:
+                    break
+                self.current = self.storage.open(self.names.pop(0), 'rb')
+            data = self.current.read(size if size and size > 0 else -1)
+            if not data:
+                self.current.close()
+                self.current = None
+                continue
+            chunks.append(data)
+            if size and size > 0:
+                size -= len(data)
+        return b''.join(chunks)
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+
+
+def document_upload_name(filename, directory=''):
+    """
+    The storage name for a document uploaded as `filename`, shortened to fit
+    Bid.documents: the end of the file name goes, its extension stays.
+    """
+    documents = Bid._meta.get_field('documents')
+    name = documents.generate_filename(None, os.path.join(directory, filename) if directory else filename)
+    excess = len(name) - documents.max_length
+    if excess > 0:
+        root, extension = os.path.splitext(name)
+        if len(os.path.basename(root)) <= excess:
+            raise ValidationError({'filename': 'This file name is too long.'})
+        name = root[:-excess] + extension
+    return name
+
+
+def store_part(session, number, stream, size, storage=default_storage):
+    """Store part `number` of a pending session from `stream`, replacing an earlier copy."""
+    if session.status != 'PENDING':
+        raise ValidationError({'detail': 'This upload is already complete.'})
+    if session.direct:
+        raise ValidationError({'detail': 'This upload goes straight to storage.'})
+    if not 1 <= number <= upload_setting('MAX_PARTS', 10000):
+        raise ValidationError({'detail': f"Part numbers run from 1 to {upload_setting('MAX_PARTS', 10000)}."})
+    if size <= 0:
+        raise ValidationError({'detail': 'A part must not be empty.'})
+    max_size = upload_setting('MAX_PART_SIZE', 16 * 1024 * 1024)
+    if size > max_size:
+        raise ValidationError({'detail': f'A part may be at most {max_size} bytes.'})
+
+    # Parts are retried after dropped connections: every copy gets its own name,
+    # and a new copy replaces the stored one only once it has fully arrived
+    name = f'{session.part_name(number)}-{uuid.uuid4().hex[:12]}'
+    reader = LimitedReader(stream, size)
+    stored_name = storage.save(name, File(reader, name=name))
+    if reader.read_bytes != size:
+        storage.delete(stored_name)
+        raise ValidationError({'detail': f'Expected {size} bytes but received {reader.read_bytes}.'})
+
+    with transaction.atomic():
+        previous = UploadPart.objects.select_for_update().filter(session=session, number=number).first()
+        part, _ = UploadPart.objects.update_or_create(session=session, number=number,
+                                                      defaults={'size': size, 'name': stored_name})
+    if previous is not None:
+        storage.delete(part_file(session, previous))
+    return part
+
+
+def part_file(session, part):
+    # Parts stored before copies were named individually use the plain part name
+    return part.name or session.part_name(part.number)
+
+
+def complete_upload(session, storage=default_storage):
+    """
+    Assemble the parts of a pending session into the bid document, remove the
+    parts, and attach the document to the session's bid if it has one.
+    """
+    if session.status != 'PENDING':
+        raise ValidationError({'detail': 'This upload is already complete.'})
+    if session.direct:
+        return verify_direct_upload(session)
+    parts = list(session.parts.order_by('number'))
+    if not parts:
+        raise ValidationError({'detail': 'No parts were uploaded.'})
+    missing = sorted(set(range(1, parts[-1].number + 1)) - {part.number for part in parts})
+    if missing:
+        raise ValidationError({'detail': 'Parts are missing.', 'missing_parts': missing})
+    size = sum(part.size for part in parts)
+    if session.total_size is not None and size != session.total_size:
+        raise ValidationError({'detail': f'Received {size} bytes but {session.total_size} were declared.'})
+
+    documents = Bid._meta.get_field('documents')
+    reader = PartsReader(storage, [part_file(session, part) for part in parts], size)
+    try:
+        # The parts live on `storage`; the document goes to the bid documents' own storage
+        name = documents.storage.save(document_upload_name(session.filename),
+                                      File(reader, name=session.filename), max_length=documents.max_length)
+    except FileNotFoundError:
+        # A part's stored copy is gone: forget it, so the client sends it again
+        lost = [part for part in parts if not storage.exists(part_file(session, part))]
+        UploadPart.objects.filter(pk__in=[part.pk for part in lost]).delete()
+        raise ValidationError({'detail': 'Parts are missing.', 'missing_parts': [part.number for part in lost]})
+    finally:
+        reader.close()
+
+    with transaction.atomic():
+        finish_upload(session, name)
+        session.parts.all().delete()
+
+    delete_parts(session, parts, storage)
+    return session
+
+
+def finish_upload(session, name):
+    """Mark a session complete, attaching the document to the session's bid if it has one."""
+    session.file = name
+    session.status = 'COMPLETE'
+    session.completed_at = timezone.now()
+    if session.bid_id is not None:
+        # Saved through the model, which keeps the document reference counts
+        bid = Bid.objects.select_for_update().get(pk=session.bid_id)
+        bid.documents = name
+        bid.document_name = os.path.basename(session.filename)
+        bid.save()
+        session.status = 'ATTACHED'
+    session.save(update_fields=['file', 'status', 'completed_at'])
+
+
+def delete_parts(session, parts=None, storage=default_storage):
+    """Remove the stored copies of a session's parts."""
+    for part in parts if parts is not None else session.parts.all():
+        storage.delete(part_file(session, part))
+
+
+def discard_upload(session, storage=default_storage):
+    """
+    Delete an abandoned session with its parts and, unless a bid has taken
+    it, its document. The row goes first, so a bid cannot claim it meanwhile.
+    """
+    parts = list(session.parts.all())
+    unclaimed = UploadSession.objects.filter(pk=session.pk).exclude(status='ATTACHED').delete()[0]
+    if not unclaimed:
+        session.delete()
+    delete_parts(session, parts, storage)
+    if unclaimed and session.file:
+        # Unless a bid already references the same content
+        transaction.on_commit(lambda: DocumentBlob.delete_orphan_file(session.file))
+
+
+def start_direct_upload(session, request, content_type=None):
+    """
+    Give a new direct session its storage key and return how the client
+    uploads to it: {'url', 'method', 'headers', 'expires_in'}.
+    """
+    max_size = upload_setting('DIRECT_MAX_SIZE', 500 * 1024 * 1024)
+    if not session.total_size:
+        raise ValidationError({'total_size': 'Declare the size of the document in bytes.'})
+    if session.total_size > max_size:
+        raise ValidationError({'total_size': f'A document may be at most {max_size} bytes.'})
+
+    documents = Bid._meta.get_field('documents')
+    session.file = document_upload_name(session.filename, f'direct/{session.pk}')
+    session.save(update_fields=['file'])
+
+    expires = upload_setting('DIRECT_EXPIRES', 300)
+    if hasattr(documents.storage, 'presigned_put_url'):
+        url, headers = documents.storage.presigned_put_url(session.file, expires, content_type)
+    else:
+        token = signing.dumps({'session': str(session.pk), 'name': session.file, 'size': session.total_size},
+                              salt=LOCAL_UPLOAD_SALT)
+        url = request.build_absolute_uri(reverse('local-upload', args=[token]))
+        headers = {'Content-Type': content_type} if content_type else {}
+    return {'url': url, 'method': 'PUT', 'headers': headers, 'expires_in': expires}
+
+
+def verify_direct_upload(session):
+    """Complete a direct session once its object exists in storage with the declared size."""
+    storage = Bid._meta.get_field('documents').storage
+    if not session.file or not storage.exists(session.file):
+        raise ValidationError({'detail': 'The document has not been uploaded yet.'})
+    size = storage.size(session.file)
+    if size != session.total_size:
+        raise ValidationError({'detail': f'Received {size} bytes but {session.total_size} were declared.'})
+    with transaction.atomic():
+        finish_upload(session, session.file)
+    return session
+
+
+def receive_local_upload(token, stream, size):
+    """
+    Store the body of a PUT to a local stand-in URL under the key its token
+    was signed for, while its session is still pending. Only for storages
+    with local paths.
+    """
+    try:
+        payload = signing.loads(token, salt=LOCAL_UPLOAD_SALT, max_age=upload_setting('DIRECT_EXPIRES', 300))
+    except signing.SignatureExpired:
+        raise PermissionDenied('This upload URL has expired.')
+    except signing.BadSignature:
+        raise PermissionDenied('Invalid upload URL.')
+    # Once verified the document may be attached to a bid; the URL must not overwrite it
+    if not UploadSession.objects.filter(pk=payload['session'], file=payload['name'], status='PENDING').exists():
+        raise PermissionDenied('This upload URL has already been used.')
+    if size > payload['size']:
+        raise ValidationError({'detail': f"This upload URL accepts at most {payload['size']} bytes."})
+
+    path = Bid._meta.get_field('documents').storage.path(payload['name'])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Written aside and renamed, so a half-sent document is never visible under its key
+    temp_path = f'{path}.upload'
+    with open(temp_path, 'wb') as target:
+        shutil.copyfileobj(LimitedReader(stream, size), target, 1024 * 1024)
+    os.replace(temp_path, path)
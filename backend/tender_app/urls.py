@@ -4,13 +4,14 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from .views import (
     TenderViewSet, BidViewSet, UserRegistrationView, login, 
     BidConfirmationViewSet, get_server_time, TenderHistoryView, 
-    company_profile, PublicWinnerView
+    company_profile, PublicWinnerView, PublicWinnersView, UploadSessionViewSet, LocalUploadView
 )
 
 router = DefaultRouter()
 router.register(r'tenders', TenderViewSet)
 router.register(r'bids', BidViewSet)
 router.register(r'bid-confirmations', BidConfirmationViewSet)
+router.register(r'uploads', UploadSessionViewSet, basename='upload')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -18,21 +19,36 @@ urlpatterns = [
     path('auth/login/', login, name='login'),
     path('server-time/', get_server_time, name='server-time'),
     path('public/tenders/<int:tender_id>/winner/', PublicWinnerView.as_view(), name='public-winner-view'),
+    path('public/winners/', PublicWinnersView.as_view(), name='public-winners'),
     path('tenders/<int:pk>/winner/', PublicWinnerView.as_view(), name='tender-winner'),
     path('tenders/<int:tender_id>/history/', TenderHistoryView.as_view(), name='tender-history'),
     path('companies/profile/', company_profile, name='company-profile'),
+    path('direct-uploads/<str:token>/', LocalUploadView.as_view(), name='local-upload'),
 ]
 
 # URL Patterns now include:
 # - /api/tenders/ - List all tenders
 # - /api/tenders/<id>/ - Retrieve, update, delete a tender
 # - /api/tenders/<id>/bids/ - List bids for a tender
-# - /api/tenders/<id>/history/ - Get tender history
+# - /api/tenders/<id>/documents/ - Stream a ZIP of all bid documents with a manifest
+# - /api/tenders/<id>/history/ - Get tender history (filter with field, action, since, until; page with page_size, cursor)
 # - /api/tenders/<id>/winner/ - Get winner info for a tender (public access)
+# - /api/public/winners/?tender_ids=1,2 - Get winner info for many tenders (public access)
 # - /api/tenders/search/ - Search and filter tenders
+# - /api/tenders/bulk/ - Create many tenders in one request
+# - /api/tenders/export/ - Stream filtered tenders as CSV or NDJSON
+# - /api/tenders/export/history/ - Stream the history of filtered tenders
+# - /api/bids/export/ - Stream bids on filtered tenders
 # - /api/bids/ - List all bids
 # - /api/bids/<id>/ - Retrieve a bid
+# - /api/bids/<id>/document/ - Download the bid's document (Range and conditional requests)
 # - /api/bids/my_bids/ - List bids for current user
 # - /api/bids/<id>/select_winner/ - Select a winning bid
+# - /api/bids/winner_status/?bid_ids=1,2 - Winner status of many bids in one request
+# - /api/uploads/ - Start a resumable bid document upload
+# - /api/uploads/<id>/ - Uploaded parts of an upload, or cancel it
+# - /api/uploads/<id>/parts/<n>/ - PUT part n of an upload
+# - /api/uploads/<id>/complete/ - Assemble the uploaded parts
+# - /api/uploads/direct/ - Start an upload straight to storage with a presigned URL
 # - /api/bid-confirmations/ - List bid confirmations
 # - /api/bid-confirmations/my_confirmations/ - List confirmations for current user 
\ No newline at end of file
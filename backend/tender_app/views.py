@@ -1,5 +1,6 @@
 from django.shortcuts import render, get_object_or_404
-from rest_framework import viewsets, status, filters
+from django.http import Http404
+from rest_framework import viewsets, status, filters, mixins
 from rest_framework.response import Response
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
@@ -8,24 +9,84 @@ from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.db import transaction
 from django.utils import timezone
+from django.db.models import Prefetch, prefetch_related_objects
 import json
 import uuid
 import logging
 from django.db import connection
 from rest_framework.exceptions import PermissionDenied
 
-from .models import User, Tender, Bid, CompanyProfile, TenderHistory, BidConfirmation
+from .models import User, Tender, Bid, CompanyProfile, TenderHistory, BidConfirmation, WinnerSnapshot, UploadSession
 from .serializers import (
-    UserSerializer, TenderSerializer, BidSerializer, 
-    TenderHistorySerializer, BidConfirmationSerializer
+    UserSerializer, TenderSerializer, TenderListSerializer, BidSerializer, 
+    TenderHistorySerializer, BidConfirmationSerializer, WinnerSnapshotSerializer, UploadSessionSerializer
 )
 from .permissions import IsCityUser, IsCompanyUser, IsCityUserOrReadOnly
+from .pagination import TenderCursorPagination, TenderHistoryCursorPagination
+from .search import filter_tenders, filter_history, facet_counts
+from .audit import record_history
+from .cache import bump_tender_version, cached_response
+from .conditional import conditional_tender_response
+from .exports import EXPORT_FORMATS, export_queryset, export_response
+from .imports import import_tenders
+from .uploads import store_part, complete_upload, discard_upload, start_direct_upload, receive_local_upload
+from .downloads import document_response, bundle_response
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
 # Create your views here.
 
+def stream_export(request, dataset, bids=None):
+    """
+    Stream one dataset as CSV or NDJSON (?export_format=, default csv),
+    filtered with the same parameters as the tender search action.
+    """
+    export_format = request.query_params.get('export_format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return Response(
+            {'detail': f'export_format must be one of: {", ".join(EXPORT_FORMATS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    queryset = export_queryset(dataset, request.query_params, bids=bids)
+    return export_response(queryset, dataset, export_format)
+
+def parse_id_list(request, param, limit):
+    """
+    Read a comma-separated list of integer IDs from the query string.
+    Returns (ids, None), or (None, a 400 response) when the list is malformed or too long.
+    """
+    try:
+        ids = [int(value) for value in request.query_params.get(param, '').split(',') if value.strip()]
+    except ValueError:
+        return None, Response(
+            {'detail': f'{param} must be a comma-separated list of integers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(ids) > limit:
+        return None, Response(
+            {'detail': f'At most {limit} {param} can be requested at once'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return ids, None
+
+def history_response(request, tender_id):
+    """
+    A tender's history, newest first, filtered by ?field=, ?action=, ?since= and
+    ?until=. Sent in keyset pages when the client passes cursor or page_size,
+    so a page costs the same however long the history is.
+    """
+    queryset = filter_history(
+        TenderHistory.objects.filter(tender_id=tender_id).select_related('performed_by'),
+        request.query_params,
+    ).order_by('-timestamp', '-id')
+
+    paginator = TenderHistoryCursorPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    if page is not None:
+        return paginator.get_paginated_response(TenderHistorySerializer(page, many=True).data)
+    return Response(TenderHistorySerializer(queryset, many=True).data)
+
 # Public API for getting winner information - accessible without authentication
 class PublicWinnerView(APIView):
     """
@@ -34,7 +95,20 @@ class PublicWinnerView(APIView):
     """
     permission_classes = [AllowAny]
     
-    def get(self, request, pk=None):
+    def get(self, request, pk=None, tender_id=None):
+        # Mounted both as tenders/<pk>/winner/ and public/tenders/<tender_id>/winner/
+        pk = pk if pk is not None else tender_id
+        # Pollers get 304 Not Modified until the award changes
+        return conditional_tender_response(request, pk, lambda: self.get_winner(request, pk))
+
+    def get_winner(self, request, pk):
+        # Awarded tenders are served from their snapshot in a single primary key lookup
+        snapshot = WinnerSnapshot.objects.filter(tender_id=pk, tender__status='AWARDED').first()
+        if snapshot is not None:
+            data = WinnerSnapshotSerializer(snapshot).data
+            data.pop('tender_id')
+            return Response(data)
+
         try:
             # Get the tender by ID
             tender = get_object_or_404(Tender, pk=pk)
@@ -92,6 +166,23 @@ class PublicWinnerView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class PublicWinnersView(APIView):
+    """
+    Winner information for many awarded tenders at once, e.g. ?tender_ids=1,2,3.
+    Tenders that are not awarded are left out of the response.
+    """
+    permission_classes = [AllowAny]
+    max_tenders = 200
+
+    def get(self, request):
+        tender_ids, error = parse_id_list(request, 'tender_ids', self.max_tenders)
+        if error:
+            return error
+
+        snapshots = WinnerSnapshot.objects.filter(tender_id__in=tender_ids, tender__status='AWARDED')
+        serializer = WinnerSnapshotSerializer(snapshots, many=True)
+        return Response(serializer.data)
+
 class AuthViewSet(viewsets.ViewSet):
     permission_classes = [AllowAny]
 
@@ -129,48 +220,73 @@ class TenderViewSet(viewsets.ModelViewSet):
     queryset = Tender.objects.all()
     serializer_class = TenderSerializer
     permission_classes = [IsAuthenticated, IsCityUser]
+    pagination_class = TenderCursorPagination
+
+    def get_expand(self):
+        expand = self.request.query_params.get('expand', '')
+        return {name.strip() for name in expand.split(',') if name.strip()}
+
+    def list(self, request, *args, **kwargs):
+        # Public and read-heavy: serve from the versioned response cache
+        return cached_response(request, lambda: super(TenderViewSet, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        tender_id = kwargs.get('pk')
+        return conditional_tender_response(request, tender_id, lambda: cached_response(
+            request,
+            lambda: super(TenderViewSet, self).retrieve(request, *args, **kwargs),
+            tender_id=tender_id,
+        ))
+
+    @staticmethod
+    def history_prefetch():
+        return Prefetch('history', queryset=TenderHistory.objects.select_related('performed_by'))
+
+    def get_queryset(self):
+        queryset = Tender.objects.select_related('created_by')
+        # Only pay for the history prefetch when the serializer will render it.
+        # Updates fetch it after saving instead (see update).
+        if self.action == 'retrieve' or 'history' in self.get_expand():
+            queryset = queryset.prefetch_related(self.history_prefetch())
+        return queryset
+
+    def get_serializer_class(self):
+        # List views get the compact representation unless history is asked for
+        if self.action in ('list', 'search') and 'history' not in self.get_expand():
+            return TenderListSerializer
+        return TenderSerializer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # Only trim read responses; writes still need every writable field
+        fields = self.request.query_params.get('fields') if self.request else None
+        if fields and self.action in ('list', 'retrieve', 'search'):
+            context['fields'] = [name.strip() for name in fields.split(',') if name.strip()]
+        return context
 
     def perform_create(self, serializer):
         tender = serializer.save(created_by=self.request.user)
         
         # Record the creation in history
-        TenderHistory.objects.create(
+        record_history([TenderHistory(
             tender=tender,
             action='CREATE',
             changes={},
             performed_by=self.request.user
-        )
+        )])
 
     def perform_update(self, serializer):
-        # Get original tender for change tracking
-        old_tender = self.get_object()
-        old_data = TenderSerializer(old_tender).data
-        
         # TEMPORARY: Allow updates to any tender for testing purposes
         # Commenting out deadline check for debugging
         # if old_tender.status != 'OPEN' or old_tender.submission_deadline < timezone.now():
         #     raise PermissionDenied("Cannot update a tender after its deadline has passed or if it's not open")
-            
-        # Save the updated tender
-        tender = serializer.save()
-        
-        # Compute changes for history
-        new_data = TenderSerializer(tender).data
-        changes = {}
-        for field in new_data:
-            if field in old_data and old_data[field] != new_data[field]:
-                changes[field] = {
-                    'old': old_data[field],
-                    'new': new_data[field]
-                }
-                
-        # Record the update in history
-        TenderHistory.objects.create(
-            tender=tender,
-            action='UPDATE',
-            changes=changes,
-            performed_by=self.request.user
-        )
+
+        with transaction.atomic():
+            # Save the updated tender; the model tracks which fields changed
+            tender = serializer.save()
+
+            # Record one history row per changed field, in a single INSERT
+            record_history(TenderHistory.for_update(tender, tender.saved_changes, self.request.user))
 
     def perform_destroy(self, instance):
         # Check if we can delete (deadline not passed)
@@ -186,7 +302,9 @@ class TenderViewSet(viewsets.ModelViewSet):
         )
         
         # Now delete the tender
+        tender_id = instance.pk
         instance.delete()
+        bump_tender_version(tender_id)
 
     def get_permissions(self):
         """
@@ -212,10 +330,10 @@ class TenderViewSet(viewsets.ModelViewSet):
         # Different behavior based on user type
         if user.user_type == 'CITY' or user.is_superuser:
             # City users and superusers can see all bids
-            bids = Bid.objects.filter(tender=tender)
+            bids = Bid.objects.with_related().with_status().filter(tender=tender)
         elif user.user_type == 'COMPANY':
             # Company users can only see their own bids
-            bids = Bid.objects.filter(tender=tender, company=user)
+            bids = Bid.objects.with_related().with_status().filter(tender=tender, company=user)
         else:
             # Public users cannot see any bids
             return Response(
@@ -223,67 +341,89 @@ class TenderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        print(f"User {user.username} ({user.user_type}) fetched {bids.count()} bids for tender {tender.id}")
-        
         serializer = BidSerializer(bids, many=True)
+        print(f"User {user.username} ({user.user_type}) fetched {len(serializer.data)} bids for tender {tender.id}")
         return Response(serializer.data)
         
+    @action(detail=True, methods=['get'])
+    def documents(self, request, pk=None):
+        """
+        Stream a ZIP of every bid's document for this tender, with a manifest
+        of bid IDs, companies and prices (city users only)
+        """
+        tender = self.get_object()
+        bids = Bid.objects.filter(tender=tender).select_related('company__company_profile').order_by('pk')
+        return bundle_response(tender, bids)
+
     @action(detail=True, methods=['get'])
     def history(self, request, pk=None):
         """
         Return change history for a specific tender
         """
+        return conditional_tender_response(request, pk, lambda: self.get_history(request, pk))
+
+    def get_history(self, request, pk):
         tender = self.get_object()
-        history = TenderHistory.objects.filter(tender=tender).order_by('-timestamp')
-        serializer = TenderHistorySerializer(history, many=True)
-        return Response(serializer.data)
+        return history_response(request, tender.pk)
     
     @action(detail=False, methods=['get'])
     def search(self, request):
         """
         Search and filter tenders
         """
-        queryset = self.get_queryset()
-        
-        # Filter by category
-        category = request.query_params.get('category')
-        if category:
-            queryset = queryset.filter(category=category)
-            
-        # Filter by status
-        status_param = request.query_params.get('status')
-        if status_param:
-            queryset = queryset.filter(status=status_param)
-            
-        # Filter by deadline (before or after a date)
-        deadline_before = request.query_params.get('deadline_before')
-        if deadline_before:
-            try:
-                deadline_date = datetime.strptime(deadline_before, '%Y-%m-%d')
-                queryset = queryset.filter(submission_deadline__lte=deadline_date)
-            except ValueError:
-                pass
-                
-        deadline_after = request.query_params.get('deadline_after')
-        if deadline_after:
-            try:
-                deadline_date = datetime.strptime(deadline_after, '%Y-%m-%d')
-                queryset = queryset.filter(submission_deadline__gte=deadline_date)
-            except ValueError:
-                pass
-                
-        # Search by title or description
-        search_term = request.query_params.get('search')
-        if search_term:
-            queryset = queryset.filter(
-                Q(title__icontains=search_term) | 
-                Q(description__icontains=search_term)
-            )
-            
-        # Return results
+        queryset = filter_tenders(self.get_queryset(), request.query_params)
+
+        # Facet counts over the whole filtered set, in one grouped aggregate query
+        facets = None
+        if request.query_params.get('facets', '').lower() in ('1', 'true', 'yes'):
+            facets = facet_counts(queryset)
+
+        # Return results, one keyset page at a time when the client asks for it
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+            if facets is not None:
+                response.data['facets'] = facets
+            return response
+
         serializer = self.get_serializer(queryset, many=True)
+        if facets is not None:
+            return Response({'results': serializer.data, 'facets': facets})
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_import(self, request):
+        """
+        Create many tenders in one request. Accepts a list of tender payloads
+        (or {"tenders": [...]}); valid rows are created, invalid ones are
+        reported by their index.
+        """
+        rows = request.data.get('tenders') if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({'detail': 'Expected a non-empty list of tenders'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        created_ids, errors = import_tenders(rows, request.user)
+        return Response(
+            {'created': len(created_ids), 'ids': created_ids, 'errors': errors},
+            status=status.HTTP_201_CREATED if created_ids else status.HTTP_400_BAD_REQUEST
+        )
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream all tenders matching the search parameters, for auditors
+        """
+        return stream_export(request, 'tenders')
+
+    @action(detail=False, methods=['get'], url_path='export/history')
+    def export_history(self, request):
+        """
+        Stream the change history of all tenders matching the search parameters
+        """
+        return stream_export(request, 'history')
+
     @action(detail=True, methods=['get'])
     def check_winner_status(self, request, pk=None):
         """
@@ -351,53 +491,16 @@ class TenderViewSet(viewsets.ModelViewSet):
             
             # Log the update attempt
             logger.info(f"Update request for tender {tender_id} by user {request.user.username}")
-            
-            # Store original values for history tracking
-            original_data = TenderSerializer(tender).data
-            
-            # Perform update with serializer
+
+            # Perform update with serializer; history is written from the model's changed fields
             serializer = self.get_serializer(tender, data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
-            
-            # Save the updated tender
             self.perform_update(serializer)
-            
-            # Create history records for changed fields
-            updated_data = serializer.data
-            changes = {}
-            
-            # More detailed tracking of specific fields to improve history
-            for field in updated_data:
-                if field in original_data and original_data[field] != updated_data[field]:
-                    # For each changed field, create a separate history record
-                    try:
-                        field_display_name = field.replace('_', ' ').title()
-                        
-                        # Format values for better readability
-                        old_value = original_data[field]
-                        new_value = updated_data[field]
-                        
-                        # Handle specific field types 
-                        if field in ['budget']:
-                            old_value = f"€{old_value}" if old_value else "Not set"
-                            new_value = f"€{new_value}" if new_value else "Not set"
-                        elif field in ['notice_date', 'submission_deadline', 'winner_date', 'construction_start', 'construction_end']:
-                            old_value = old_value or "Not set"
-                            new_value = new_value or "Not set"
-                        
-                        TenderHistory.objects.create(
-                            tender=tender,
-                            action='UPDATE',
-                            field_name=field,
-                            old_value=str(old_value),
-                            new_value=str(new_value),
-                            performed_by=request.user
-                        )
-                        logger.info(f"Created history record for tender {tender_id} field '{field}' update")
-                    except Exception as e:
-                        # Continue even if one history creation fails
-                        logger.error(f"Failed to create history record for field '{field}': {str(e)}")
-            
+
+            # Load the history for the response once, including the rows just written
+            tender._prefetched_objects_cache = {}
+            prefetch_related_objects([tender], self.history_prefetch())
+
             return Response(serializer.data)
         
         except Exception as e:
@@ -432,30 +535,55 @@ class BidViewSet(viewsets.ModelViewSet):
         """
         user = self.request.user
         if user.is_superuser or user.user_type == 'CITY':
-            return Bid.objects.all()
+            return Bid.objects.with_related().with_status()
         elif user.user_type == 'COMPANY':
-            return Bid.objects.filter(company=user)
+            return Bid.objects.with_related().with_status().filter(company=user)
         return Bid.objects.none()
 
     def perform_create(self, serializer):
         # Print the request data for debugging
         print(f"Creating bid with data: {self.request.data}")
         try:
-            # Create the bid
-            bid = serializer.save(company=self.request.user)
-            
-            # Create confirmation code
-            confirmation_code = uuid.uuid4().hex
-            BidConfirmation.objects.create(
-                bid=bid,
-                confirmation_code=confirmation_code
-            )
+            with transaction.atomic():
+                # Create the bid
+                bid = serializer.save(company=self.request.user)
+
+                # Create confirmation code
+                confirmation_code = uuid.uuid4().hex
+                BidConfirmation.objects.create(
+                    bid=bid,
+                    confirmation_code=confirmation_code
+                )
+
+                # Keep the tender's bid statistics current
+                Tender.objects.add_bid_to_stats(bid.tender_id, bid.bidding_price)
             
             print(f"Bid created successfully by {self.request.user.username}")
         except Exception as e:
             print(f"Error creating bid: {str(e)}")
             raise
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            bid = serializer.save()
+            changes = bid.saved_changes
+            # A new price, or a bid moved to another tender, changes the stats of every tender involved
+            if 'bidding_price' in changes or 'tender' in changes:
+                tender_ids = {bid.tender_id, changes.get('tender', (None,))[0]} - {None}
+                Tender.objects.filter(pk__in=tender_ids).refresh_bid_stats()
+            else:
+                tender_ids = set()
+        for tender_id in tender_ids:
+            bump_tender_version(tender_id)
+
+    def perform_destroy(self, instance):
+        tender_id = instance.tender_id
+        with transaction.atomic():
+            instance.delete()
+            # Min and max cannot be adjusted incrementally, so recompute this tender's stats
+            Tender.objects.filter(pk=tender_id).refresh_bid_stats()
+        bump_tender_version(tender_id)
+
     @action(detail=False, methods=['get'])
     def my_bids(self, request):
         """
@@ -465,22 +593,43 @@ class BidViewSet(viewsets.ModelViewSet):
         
         # Company users can only view their own bids
         if user.user_type == 'COMPANY':
-            bids = Bid.objects.filter(company=user)
+            bids = Bid.objects.with_related().with_status().filter(company=user)
         # City users and superusers can view all bids
         elif user.is_superuser or user.user_type == 'CITY':
-            bids = Bid.objects.all()
+            bids = Bid.objects.with_related().with_status()
         else:
             return Response(
                 {'detail': 'You do not have permission to view bids.'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Enhanced logging for debugging
-        print(f"User {user.username} ({user.user_type}) retrieved {bids.count()} bids")
-        
         serializer = self.get_serializer(bids, many=True)
+
+        # Enhanced logging for debugging
+        print(f"User {user.username} ({user.user_type}) retrieved {len(serializer.data)} bids")
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream the bids visible to the current user on tenders matching the search parameters
+        """
+        return stream_export(request, 'bids', bids=self.get_queryset())
+
+    @action(detail=True, methods=['get'])
+    def document(self, request, pk=None):
+        """
+        Download this bid's document: the city's users and the bidding company
+        only. Supports Range and conditional requests, see tender_app.downloads.
+        """
+        bid = self.get_object()
+        if not bid.documents:
+            raise Http404('This bid has no document.')
+        try:
+            return document_response(request, bid.documents, bid.document_filename)
+        except FileNotFoundError:
+            raise Http404('The document file is missing.')
+
     @action(detail=True, methods=['post'])
     def select_winner(self, request, pk=None):
         """Select this bid as the winner for the tender."""
@@ -494,104 +643,20 @@ class BidViewSet(viewsets.ModelViewSet):
             # Note: The IsCityUser permission class now handles city user verification
             # so we don't need to check user.user_type here
             
-            # Get the tender associated with this bid
-            tender = bid.tender
-            logger.info(f"Bid {bid.id} is for tender {tender.id}: {tender.title}, current status: {tender.status}")
-            
             # Removing deadline check to improve usability
             # City users should be able to select a winner at their discretion
-            
-            # Check if tender is already awarded to prevent changes
-            if tender.status == 'AWARDED':
-                logger.warning(f"Attempted to select winner for tender {tender.id} but it's already awarded")
+
+            logger.info(f"Awarding tender {bid.tender_id} to company {bid.company_id} (bid {bid.id})")
+            awarded_timestamp = Tender.objects.award(bid, user)
+            if awarded_timestamp is None:
+                logger.warning(f"Attempted to select winner for tender {bid.tender_id} but it's already awarded")
                 return Response({"detail": "This tender has already been awarded."}, status=400)
-            
-            # Store company ID for better logging
-            company_id = bid.company_id
-            logger.info(f"Awarding tender {tender.id} to company {company_id} (bid {bid.id})")
-            
-            # PART 1: Use Django ORM within transaction
-            from django.db import transaction
-            awarded_timestamp = timezone.now()
-            
-            with transaction.atomic():
-                # First reset all bids for this tender to not be winners
-                Bid.objects.filter(tender=tender).update(is_winner=False, awarded_at=None)
-                
-                # Then mark this bid as winner
-                bid.is_winner = True
-                bid.awarded_at = awarded_timestamp
-                bid.save(update_fields=['is_winner', 'awarded_at'])
-                
-                # Finally update the tender
-                tender.status = 'AWARDED'
-                tender.winning_bid = bid  # Set the foreign key relationship
-                tender.winner_date = awarded_timestamp  # Set the winner date
-                tender.save(update_fields=['status', 'winning_bid', 'winner_date'])
-                
-                logger.info(f"Transaction 1 complete: Marked bid {bid.id} as winner for tender {tender.id}")
-            
-            # PART 2: Failsafe - use direct SQL to ensure changes were made
-            with connection.cursor() as cursor:
-                # First update this specific bid to be the winner
-                cursor.execute("""
-                    UPDATE tender_app_bid
-                    SET is_winner = TRUE, awarded_at = %s
-                    WHERE id = %s
-                """, [awarded_timestamp, bid.id])
-                
-                # Then update the tender 
-                cursor.execute("""
-                    UPDATE tender_app_tender
-                    SET status = %s, winning_bid_id = %s, winner_date = %s
-                    WHERE id = %s
-                """, ['AWARDED', bid.id, awarded_timestamp, tender.id])
-                
-                logger.info(f"Transaction 2 complete: Direct SQL updates completed for bid {bid.id} and tender {tender.id}")
-            
-            # PART 3: Create tender history record
-            try:
-                TenderHistory.objects.create(
-                    tender=tender,
-                    action='UPDATE',
-                    changes={"status": {"old": "OPEN", "new": "AWARDED"}, "winner": {"old": None, "new": bid.id}},
-                    performed_by=user
-                )
-                logger.info(f"Created tender history record for winner selection (tender {tender.id}, bid {bid.id})")
-            except Exception as history_error:
-                logger.error(f"Failed to create tender history: {str(history_error)}")
-            
-            # Verify changes were made correctly
-            verification_bid = Bid.objects.get(id=bid.id)
-            verification_tender = Tender.objects.get(id=tender.id)
-            
-            if not verification_bid.is_winner or verification_tender.status != 'AWARDED':
-                logger.error(f"Verification failed! Bid {verification_bid.id} has is_winner={verification_bid.is_winner}, "
-                             f"Tender {verification_tender.id} has status={verification_tender.status}")
-            else:
-                logger.info(f"Verification successful! Bid {verification_bid.id} is marked as winner and "
-                            f"tender {verification_tender.id} is now {verification_tender.status}")
-            
-            # Double check with direct SQL
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT b.id, b.is_winner, b.tender_id, t.status, t.winning_bid_id 
-                    FROM tender_app_bid b
-                    JOIN tender_app_tender t ON b.tender_id = t.id
-                    WHERE b.id = %s
-                """, [bid.id])
-                row = cursor.fetchone()
-                
-                if row:
-                    direct_bid_id, direct_is_winner, direct_tender_id, direct_tender_status, direct_winning_bid_id = row
-                    logger.info(f"Final SQL verification: Bid {direct_bid_id} has is_winner={direct_is_winner}, "
-                                f"Tender {direct_tender_id} status={direct_tender_status}, "
-                                f"winning_bid_id={direct_winning_bid_id}")
-            
+            logger.info(f"Marked bid {bid.id} as winner for tender {bid.tender_id}")
+
             return Response({
                 "detail": "Winner selected successfully",
                 "bid_id": bid.id,
-                "tender_id": tender.id,
+                "tender_id": bid.tender_id,
                 "tender_status": 'AWARDED',
                 "awarded_at": awarded_timestamp
             })
@@ -600,6 +665,37 @@ class BidViewSet(viewsets.ModelViewSet):
             logger.error(f"Error selecting winner: {str(e)}")
             return Response({"detail": f"Failed to select winner: {str(e)}"}, status=500)
 
+    @action(detail=False, methods=['get'])
+    def winner_status(self, request):
+        """
+        Winner status of many bids at once, e.g. ?bid_ids=1,2,3, in one joined query.
+        Same fields as check_winner_status plus the tender's winning_bid_id;
+        bids that do not exist or are not visible to the user are left out.
+        """
+        bid_ids, error = parse_id_list(request, 'bid_ids', 200)
+        if error:
+            return error
+
+        rows = Bid.objects.filter(pk__in=bid_ids).order_by('pk').values_list(
+            'id', 'is_winner', 'tender_id', 'awarded_at', 'tender__status', 'tender__winning_bid_id'
+        )
+        user = request.user
+        if not (user.is_superuser or user.user_type == 'CITY'):
+            rows = rows.filter(company=user)
+
+        return Response([
+            {
+                'bid_id': bid_id,
+                'is_winner': is_winner,
+                'tender_id': tender_id,
+                'tender_status': tender_status,
+                'awarded_at': awarded_at,
+                'winning_bid_id': winning_bid_id,
+                'is_winning_bid_in_tender': winning_bid_id == bid_id,
+            }
+            for bid_id, is_winner, tender_id, awarded_at, tender_status, winning_bid_id in rows
+        ])
+
     @action(detail=True, methods=['get'])
     def check_winner_status(self, request, pk=None):
         """Check if this bid is marked as a winner directly from the database using SQL."""
@@ -650,6 +746,82 @@ class BidViewSet(viewsets.ModelViewSet):
             logger.error(f"Error checking winner status for bid {pk}: {str(e)}")
             return Response({"detail": f"Error checking winner status: {str(e)}"}, status=500)
 
+class UploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                          mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable chunked upload of a bid document:
+    - POST /api/uploads/ with filename (and optionally total_size and bid) to start
+    - PUT /api/uploads/<id>/parts/<n>/ with the raw bytes of part n (1-based)
+    - GET /api/uploads/<id>/ to see which parts arrived, e.g. to resume
+    - POST /api/uploads/<id>/complete/ to assemble the document
+    Or send the document straight to storage:
+    - POST /api/uploads/direct/ with filename and total_size (and optionally
+      content_type and bid) returns the session with a short-lived `upload`
+      URL, method and headers for a single PUT of the whole document
+    Then create the bid with upload_id=<id> instead of a documents file,
+    unless the upload was started for an existing bid. A direct upload is
+    checked for existence and size at that point (or by POSTing complete).
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(owner=self.request.user).prefetch_related('parts')
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+
+    def perform_destroy(self, instance):
+        discard_upload(instance)
+
+    @action(detail=True, methods=['put'], url_path=r'parts/(?P<number>\d+)')
+    def upload_part(self, request, pk=None, number=None):
+        session = self.get_object()
+        try:
+            size = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            size = 0
+        if not size:
+            return Response({'detail': 'Send the part as the raw request body with a Content-Length.'},
+                            status=status.HTTP_411_LENGTH_REQUIRED)
+        # Read from the WSGI stream, so the part is never held in memory as a whole
+        part = store_part(session, int(number), request._request, size)
+        return Response({'number': part.number, 'size': part.size})
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        session = complete_upload(self.get_object())
+        return Response(self.get_serializer(session).data)
+
+    @action(detail=False, methods=['post'])
+    def direct(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            session = serializer.save(owner=request.user, direct=True)
+            upload = start_direct_upload(session, request, request.data.get('content_type'))
+        return Response({**self.get_serializer(session).data, 'upload': upload}, status=status.HTTP_201_CREATED)
+
+class LocalUploadView(APIView):
+    """
+    Stand-in for a storage service's presigned PUT URL, used when the document
+    storage cannot presign (see tender_app.uploads). The signed token is the
+    only credential: it names the one key it may write and expires quickly.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def put(self, request, token):
+        try:
+            size = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            size = 0
+        if not size:
+            return Response({'detail': 'Send the document as the raw request body with a Content-Length.'},
+                            status=status.HTTP_411_LENGTH_REQUIRED)
+        receive_local_upload(token, request._request, size)
+        return Response(status=status.HTTP_200_OK)
+
 class BidConfirmationViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for bid confirmations
@@ -844,69 +1016,24 @@ class TenderHistoryView(APIView):
 
     def get(self, request, tender_id):
         """
-        Retrieve all history records for a specific tender.
+        Retrieve the history records of a specific tender, optionally filtered and paginated.
         """
-        try:
-            # Log the request
-            logger.info(f"Fetching history for tender ID: {tender_id}")
-            
-            # Get tender to verify it exists
-            try:
-                tender = Tender.objects.get(id=tender_id)
-            except Tender.DoesNotExist:
-                logger.warning(f"Tender with ID {tender_id} not found for history request")
-                return Response(
-                    {"detail": "Tender not found"}, 
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            
-            # Get actual history records
-            history_records = TenderHistory.objects.filter(tender_id=tender_id).order_by('-timestamp')
-            
-            # Sample data for demo if no real data exists
-            if not history_records:
-                # Create sample records for demonstration
-                sample_records = []
-                
-                # Basic "created" record
-                sample_records.append({
-                    'id': 1,
-                    'tender_id': tender_id,
-                    'field': 'status',
-                    'old_value': '',
-                    'new_value': 'OPEN',
-                    'timestamp': (tender.created_at or timezone.now()).isoformat(),
-                    'user': 'admin@cityoffice.gov',
-                    'action': 'created'
-                })
-                
-                # If tender is awarded, add some history
-                if tender.status == 'AWARDED':
-                    # Add status change record
-                    sample_records.append({
-                        'id': 2,
-                        'tender_id': tender_id,
-                        'field': 'status',
-                        'old_value': 'OPEN',
-                        'new_value': 'AWARDED',
-                        'timestamp': (tender.awarded_date or timezone.now()).isoformat(),
-                        'user': 'admin@cityoffice.gov',
-                        'action': 'updated'
-                    })
-                
-                return Response(sample_records, status=status.HTTP_200_OK)
-            
-            # Serialize the real history records
-            serializer = TenderHistorySerializer(history_records, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            logger.error(f"Error retrieving tender history: {str(e)}")
+        return conditional_tender_response(request, tender_id, lambda: self.get_history(request, tender_id))
+
+    def get_history(self, request, tender_id):
+        # Log the request
+        logger.info(f"Fetching history for tender ID: {tender_id}")
+
+        # Verify the tender exists
+        if not Tender.objects.filter(id=tender_id).exists():
+            logger.warning(f"Tender with ID {tender_id} not found for history request")
             return Response(
-                {"detail": f"Error retrieving history: {str(e)}"}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {"detail": "Tender not found"},
+                status=status.HTTP_404_NOT_FOUND
             )
 
+        return history_response(request, tender_id)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def company_profile(request):
@@ -92,6 +92,33 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Tender list/detail responses are cached under version counters (tender_app/cache.py).
+# Use a shared backend such as Redis or Memcached when running more than one worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tender-cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Cached responses are invalidated by version bumps; the timeout (seconds) only
+# evicts entries that can no longer be looked up
+TENDER_RESPONSE_CACHE_TIMEOUT = 300
+
+# Tender history (audit log) writes (tender_app/audit.py).
+# 'sync' inserts rows inside the request; 'async' hands them to a background
+# thread that inserts them in batches after the request's transaction commits.
+TENDER_AUDIT_MODE = os.environ.get('TENDER_AUDIT_MODE', 'sync')
+TENDER_AUDIT_BATCH_SIZE = 500
+TENDER_AUDIT_FLUSH_INTERVAL = 0.5  # seconds
+# Rows the background writer could not insert; load them with `manage.py flush_audit_spool`
+TENDER_AUDIT_SPOOL_PATH = os.path.join(BASE_DIR, 'audit_spool.jsonl')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -130,6 +157,23 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Resumable chunked uploads of bid documents (tender_app/uploads.py)
+TENDER_UPLOAD_MAX_PART_SIZE = 16 * 1024 * 1024  # bytes per part, read straight into storage
+TENDER_UPLOAD_MAX_PARTS = 10000
+# Storage of bid documents. Storages with a presigned_put_url() method (such as
+# your_project.storage.SupabaseStorage) let clients upload documents directly.
+TENDER_DOCUMENT_STORAGE = os.environ.get('TENDER_DOCUMENT_STORAGE', 'tender_app.storage.ContentAddressedStorage')
+# Direct uploads through presigned URLs; storages that cannot presign get a local stand-in URL
+TENDER_UPLOAD_DIRECT_MAX_SIZE = 500 * 1024 * 1024  # bytes
+TENDER_UPLOAD_DIRECT_EXPIRES = 300  # seconds an upload URL stays valid
+
+# Bid document downloads (tender_app/downloads.py). Set to 'x-accel-redirect'
+# (nginx) or 'x-sendfile' (Apache, lighttpd) to let the front server send the
+# file once the view has checked permissions; empty serves it from Django.
+TENDER_DOCUMENT_OFFLOAD = os.environ.get('TENDER_DOCUMENT_OFFLOAD', '')
+# Internal nginx location that aliases MEDIA_ROOT
+TENDER_DOCUMENT_ACCEL_PREFIX = '/protected-media/'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -179,6 +223,7 @@ CORS_EXPOSE_HEADERS = [
     'cache-control',
     'expires',
     'last-modified',
+    'etag',
 ]
 
 # Rest Framework settings
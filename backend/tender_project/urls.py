@@ -16,10 +16,9 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('tender_app.urls')),  # All API routes start with /api/ prefix
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
+# Bid documents are not served from MEDIA_URL: they are private, see /api/bids/<id>/document/
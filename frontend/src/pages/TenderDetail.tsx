@@ -113,6 +113,7 @@ interface Bid {
   company_name: string;
   bidding_price: number;
   documents: string;
+  document_url?: string | null;
   submission_date: string;
   status: 'ACCEPTED' | 'REJECTED' | 'PENDING' | string;
   is_winner: boolean;
@@ -362,9 +363,34 @@ const TenderDetail: React.FC = () => {
     }
   };
 
-  const handleViewDocument = (documentUrl: string) => {
-    setDocumentPreviewUrl(documentUrl);
-    setDocumentPreviewOpen(true);
+  // Documents are private, so they are fetched with the token and previewed from a local object URL
+  const handleViewDocument = async (documentUrl?: string | null) => {
+    if (!documentUrl) return;
+    try {
+      const token = localStorage.getItem('token');
+      const response = await fetch(`http://localhost:8000${documentUrl}`, {
+        headers: {
+          'Authorization': `Bearer ${token}`,
+        },
+      });
+      if (!response.ok) {
+        throw new Error(`Failed to load document: ${response.status}`);
+      }
+      const blob = await response.blob();
+      setDocumentPreviewUrl(URL.createObjectURL(blob));
+      setDocumentPreviewOpen(true);
+    } catch (err) {
+      console.error('Error loading document:', err);
+      setError('Failed to load the document. Please try again.');
+    }
+  };
+
+  const handleCloseDocumentPreview = () => {
+    if (documentPreviewUrl) {
+      URL.revokeObjectURL(documentPreviewUrl);
+    }
+    setDocumentPreviewUrl(null);
+    setDocumentPreviewOpen(false);
   };
 
   const isDeadlinePassed = (deadline: string): boolean => {
@@ -1135,7 +1161,7 @@ const TenderDetail: React.FC = () => {
                               <Button
                                 size="small"
                                 startIcon={<DescriptionIcon />}
-                                onClick={() => handleViewDocument(bid.documents)}
+                                onClick={() => handleViewDocument(bid.document_url)}
                               >
                             View
                               </Button>
@@ -1218,7 +1244,7 @@ const TenderDetail: React.FC = () => {
 
       <Dialog 
         open={documentPreviewOpen} 
-        onClose={() => setDocumentPreviewOpen(false)}
+        onClose={handleCloseDocumentPreview}
           maxWidth="lg"
         fullWidth
       >
@@ -1235,7 +1261,7 @@ const TenderDetail: React.FC = () => {
           )}
         </DialogContent>
         <DialogActions>
-          <Button onClick={() => setDocumentPreviewOpen(false)}>Close</Button>
+          <Button onClick={handleCloseDocumentPreview}>Close</Button>
             {documentPreviewUrl && (
           <Button 
                 href={documentPreviewUrl} 
@@ -110,6 +110,7 @@ interface Bid {
   };
   bidding_price: number;
   documents: string;
+  document_url?: string | null;
   additional_notes: string;
   submission_date: string;
   status: string;
@@ -131,6 +132,7 @@ const TenderDetail: React.FC = () => {
   const [documentPreviewUrl, setDocumentPreviewUrl] = useState<string | null>(null);
   const [documentPreviewOpen, setDocumentPreviewOpen] = useState(false);
   const [selectedDocument, setSelectedDocument] = useState<string | null>(null);
+  const [selectedDocumentType, setSelectedDocumentType] = useState<string>('');
   const [userType, setUserType] = useState<'CITY' | 'COMPANY'>('CITY');
 
   useEffect(() => {
@@ -331,9 +333,35 @@ const TenderDetail: React.FC = () => {
     setCompanyDetailsOpen(true);
   };
 
-  const handleViewDocument = (documentUrl: string) => {
-    setSelectedDocument(documentUrl);
-    setDocumentPreviewOpen(true);
+  // Documents are private, so they are fetched with the token and previewed from a local object URL
+  const handleViewDocument = async (documentUrl?: string | null) => {
+    if (!documentUrl) return;
+    try {
+      const token = localStorage.getItem('token');
+      const response = await fetch(`http://localhost:8000${documentUrl}`, {
+        headers: {
+          'Authorization': `Bearer ${token}`,
+        },
+      });
+      if (!response.ok) {
+        throw new Error(`Failed to load document: ${response.status}`);
+      }
+      const blob = await response.blob();
+      setSelectedDocument(URL.createObjectURL(blob));
+      setSelectedDocumentType(blob.type);
+      setDocumentPreviewOpen(true);
+    } catch (err) {
+      console.error('Error loading document:', err);
+      setError('Failed to load the document. Please try again.');
+    }
+  };
+
+  const handleCloseDocumentPreview = () => {
+    if (selectedDocument) {
+      URL.revokeObjectURL(selectedDocument);
+    }
+    setSelectedDocument(null);
+    setDocumentPreviewOpen(false);
   };
 
   const renderWinnerSection = () => {
@@ -540,12 +568,12 @@ const TenderDetail: React.FC = () => {
                         >
                           {userType === 'COMPANY' ? 'Your Company' : bid.company_name}
                         </Button>
-                        {bid.documents && (
+                        {bid.document_url && (
                           <Button
                             variant="outlined"
                             size="small"
                             startIcon={<DescriptionIcon />}
-                            onClick={() => handleViewDocument(bid.documents)}
+                            onClick={() => handleViewDocument(bid.document_url)}
                           >
                             Document
                           </Button>
@@ -662,23 +690,23 @@ const TenderDetail: React.FC = () => {
       {/* Document Preview Dialog */}
       <Dialog 
         open={documentPreviewOpen} 
-        onClose={() => setDocumentPreviewOpen(false)}
+        onClose={handleCloseDocumentPreview}
         maxWidth="md"
         fullWidth
       >
         <DialogTitle>Document Preview</DialogTitle>
         <DialogContent>
           {selectedDocument ? (
-            selectedDocument.endsWith('.pdf') ? (
+            selectedDocumentType === 'application/pdf' ? (
               <iframe 
-                src={`http://localhost:8000${selectedDocument}`}
+                src={selectedDocument}
                 style={{ width: '100%', height: '70vh' }}
                 title="Document Preview"
               />
             ) : (
               <Box sx={{ textAlign: 'center' }}>
                 <img 
-                  src={`http://localhost:8000${selectedDocument}`}
+                  src={selectedDocument}
                   alt="Document Preview"
                   style={{ maxWidth: '100%', maxHeight: '70vh' }}
                 />
@@ -689,11 +717,11 @@ const TenderDetail: React.FC = () => {
           )}
         </DialogContent>
         <DialogActions>
-          <Button onClick={() => setDocumentPreviewOpen(false)}>Close</Button>
+          <Button onClick={handleCloseDocumentPreview}>Close</Button>
           <Button 
             variant="contained" 
             color="primary"
-            href={`http://localhost:8000${selectedDocument}`}
+            href={selectedDocument || undefined}
             target="_blank"
           >
             Download
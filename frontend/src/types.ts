@@ -5,6 +5,7 @@ export interface Bid {
   company_name?: string;
   bidding_price: number;
   documents: string;
+  document_url?: string | null;
   submission_date: string;
   is_winner: boolean;
   awarded_at?: string | null;
@@ -0,0 +1,393 @@
+"""
+本地文件系统实现的 S3 兼容服务,用于离线测试 SupabaseStorage(包括分片并行上传)。
+
+只实现 SupabaseStorage 用到的接口:对象的 PUT / GET(支持 Range)/ HEAD / DELETE,
+ListObjectsV2,以及分片上传(CreateMultipartUpload、UploadPart、
+CompleteMultipartUpload、AbortMultipartUpload)。不校验签名(预签名地址只检查
+是否过期),仅使用 path 寻址。
+
+    python -m your_project.local_s3 --root /tmp/local-s3 --port 9000
+
+然后设置 AWS_S3_ENDPOINT_URL = 'http://127.0.0.1:9000'。在测试中可以用
+serve(root) 在后台线程启动,server.max_concurrent_parts 记录同时上传的最大分片数,
+server.part_delay 让每个分片多停留若干秒,server.fail_requests 让接下来的 N 个请求
+返回 503 SlowDown,用来验证重试(见 your_project/tests.py)。
+"""
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+S3_NS = 'http://s3.amazonaws.com/doc/2006-03-01/'
+COPY_CHUNK_SIZE = 1024 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def iso_timestamp(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+def md5_file(path):
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LocalS3Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, root):
+        super().__init__(address, LocalS3Handler)
+        self.root = root
+        self.lock = threading.Lock()
+        self.active_parts = 0
+        self.max_concurrent_parts = 0
+        self.part_delay = 0  # 每个分片写入后额外等待的秒数
+        self.fail_requests = 0  # 接下来这么多个请求返回 503
+        self.requests = []  # (method, path, query) 便于测试断言
+
+    def object_path(self, bucket, key):
+        path = os.path.normpath(os.path.join(self.root, bucket, key))
+        if not path.startswith(os.path.join(self.root, bucket) + os.sep):
+            raise ValueError('Invalid key')
+        return path
+
+    def upload_dir(self, upload_id):
+        if not re.fullmatch(r'[0-9a-f]{32}', upload_id or ''):
+            raise ValueError('Invalid upload id')
+        return os.path.join(self.root, '.multipart', upload_id)
+
+
+class LocalS3Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # boto3 使用 keep-alive 和 Expect: 100-continue
+
+    def log_message(self, format, *args):
+        pass
+
+    # 请求解析
+
+    def parse(self):
+        parts = urlsplit(self.path)
+        self.query = {name: values[0] for name, values in parse_qs(parts.query, keep_blank_values=True).items()}
+        bucket, _, key = unquote(parts.path).lstrip('/').partition('/')
+        self.bucket, self.key = bucket, key
+        self.server.requests.append((self.command, parts.path, self.query))
+
+    def read_body(self):
+        """请求体的分块生成器;支持 aws-chunked 编码(带签名的流式上传)。"""
+        length = int(self.headers.get('Content-Length') or 0)
+        if 'aws-chunked' in (self.headers.get('Content-Encoding') or '') or \
+                (self.headers.get('x-amz-content-sha256') or '').startswith('STREAMING-'):
+            yield from self.read_aws_chunked()
+            return
+        while length > 0:
+            chunk = self.rfile.read(min(length, COPY_CHUNK_SIZE))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+    def read_aws_chunked(self):
+        while True:
+            header = self.rfile.readline().strip()
+            size = int(header.split(b';')[0], 16)
+            if size == 0:
+                # 跳过 trailer 直到空行
+                while self.rfile.readline().strip():
+                    pass
+                return
+            remaining = size
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, COPY_CHUNK_SIZE))
+                remaining -= len(chunk)
+                yield chunk
+            self.rfile.readline()
+
+    def write_body_to(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        digest = hashlib.md5()
+        with open(temp_path, 'wb') as f:
+            for chunk in self.read_body():
+                digest.update(chunk)
+                f.write(chunk)
+        os.replace(temp_path, path)
+        return digest.hexdigest()
+
+    # 响应
+
+    def respond(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def respond_xml(self, status, element):
+        body = b'<?xml version="1.0" encoding="UTF-8"?>' + ElementTree.tostring(element)
+        self.respond(status, body, {'Content-Type': 'application/xml'})
+
+    def error(self, status, code, message=''):
+        if self.command == 'HEAD':
+            self.respond(status)
+            return
+        body = (f'<?xml version="1.0" encoding="UTF-8"?><Error><Code>{code}</Code>'
+                f'<Message>{escape(message)}</Message><Key>{escape(self.key)}</Key></Error>')
+        self.respond(status, body.encode(), {'Content-Type': 'application/xml'})
+
+    def element(self, tag, children=()):
+        root = ElementTree.Element(tag, xmlns=S3_NS)
+        for name, value in children:
+            ElementTree.SubElement(root, name).text = str(value)
+        return root
+
+    def object_headers(self, path):
+        stat = os.stat(path)
+        return {
+            'ETag': f'"{md5_file(path)}"',
+            'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+            'Content-Type': 'application/octet-stream',
+            'Accept-Ranges': 'bytes',
+        }
+
+    # 方法
+
+    def handle_request(self):
+        try:
+            self.parse()
+            if self.presigned_url_expired():
+                self.error(403, 'AccessDenied', 'Request has expired')
+                return
+            if self.injected_failure():
+                # 读完请求体,保持连接可复用
+                for _ in self.read_body():
+                    pass
+                self.error(503, 'SlowDown', 'Please reduce your request rate.')
+                return
+            self.dispatch()
+        except ValueError as e:
+            self.error(400, 'InvalidRequest', str(e))
+
+    def injected_failure(self):
+        with self.server.lock:
+            if self.server.fail_requests > 0:
+                self.server.fail_requests -= 1
+                return True
+        return False
+
+    def presigned_url_expired(self):
+        """预签名地址(X-Amz-Date + X-Amz-Expires)只检查是否过期,不校验签名"""
+        if 'X-Amz-Date' not in self.query or 'X-Amz-Expires' not in self.query:
+            return False
+        signed_at = datetime.strptime(self.query['X-Amz-Date'], '%Y%m%dT%H%M%SZ').replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - signed_at).total_seconds() > int(self.query['X-Amz-Expires'])
+
+    def dispatch(self):
+        if self.command in ('GET', 'HEAD'):
+            if self.key:
+                self.get_object()
+            else:
+                self.list_objects()
+        elif self.command == 'PUT':
+            if 'uploadId' in self.query:
+                self.upload_part()
+            else:
+                self.put_object()
+        elif self.command == 'POST' and 'uploads' in self.query:
+            self.create_multipart_upload()
+        elif self.command == 'POST' and 'uploadId' in self.query:
+            self.complete_multipart_upload()
+        elif self.command == 'DELETE':
+            if 'uploadId' in self.query:
+                self.abort_multipart_upload()
+            else:
+                self.delete_object()
+        else:
+            self.error(400, 'InvalidRequest', f'Unsupported {self.command} request')
+
+    do_HEAD = do_GET = do_PUT = do_POST = do_DELETE = handle_request
+
+    def put_object(self):
+        if not self.key:
+            # CreateBucket
+            os.makedirs(os.path.join(self.server.root, self.bucket), exist_ok=True)
+            self.respond(200)
+            return
+        etag = self.write_body_to(self.server.object_path(self.bucket, self.key))
+        self.respond(200, headers={'ETag': f'"{etag}"'})
+
+    def get_object(self):
+        path = self.server.object_path(self.bucket, self.key)
+        if not os.path.isfile(path):
+            self.error(404, 'NoSuchKey', 'The specified key does not exist.')
+            return
+        size = os.path.getsize(path)
+        headers = self.object_headers(path)
+        start, end, status = 0, size - 1, 200
+        match = RANGE_RE.match(self.headers.get('Range') or '')
+        if match and any(match.groups()):
+            first, last = match.groups()
+            if first:
+                start, end = int(first), min(int(last), size - 1) if last else size - 1
+            else:
+                start = max(size - int(last), 0)
+            if start > end:
+                self.error(416, 'InvalidRange', 'The requested range is not satisfiable')
+                return
+            status = 206
+            headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        if self.command == 'HEAD':
+            return
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(remaining, COPY_CHUNK_SIZE))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                self.wfile.write(chunk)
+
+    def delete_object(self):
+        path = self.server.object_path(self.bucket, self.key)
+        if os.path.isfile(path):
+            os.remove(path)
+        self.respond(204)
+
+    def list_objects(self):
+        prefix = self.query.get('prefix', '')
+        delimiter = self.query.get('delimiter', '')
+        bucket_root = os.path.join(self.server.root, self.bucket)
+        keys = []
+        for directory, _, filenames in os.walk(bucket_root):
+            for filename in filenames:
+                if filename.endswith('.tmp'):
+                    continue
+                key = os.path.relpath(os.path.join(directory, filename), bucket_root).replace(os.sep, '/')
+                if key.startswith(prefix):
+                    keys.append(key)
+
+        result = self.element('ListBucketResult', [('Name', self.bucket), ('Prefix', prefix), ('IsTruncated', 'false')])
+        common_prefixes = set()
+        for key in sorted(keys):
+            rest = key[len(prefix):]
+            if delimiter and delimiter in rest:
+                common_prefixes.add(prefix + rest.split(delimiter, 1)[0] + delimiter)
+                continue
+            path = os.path.join(bucket_root, key)
+            contents = ElementTree.SubElement(result, 'Contents')
+            for name, value in (('Key', key), ('Size', os.path.getsize(path)),
+                                ('LastModified', iso_timestamp(os.path.getmtime(path)))):
+                ElementTree.SubElement(contents, name).text = str(value)
+        for common_prefix in sorted(common_prefixes):
+            ElementTree.SubElement(ElementTree.SubElement(result, 'CommonPrefixes'), 'Prefix').text = common_prefix
+        ElementTree.SubElement(result, 'KeyCount').text = str(len(result.findall('Contents')) + len(common_prefixes))
+        self.respond_xml(200, result)
+
+    def create_multipart_upload(self):
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self.server.upload_dir(upload_id))
+        with open(os.path.join(self.server.upload_dir(upload_id), 'key'), 'w', encoding='utf-8') as f:
+            f.write(self.key)
+        self.respond_xml(200, self.element('InitiateMultipartUploadResult', [
+            ('Bucket', self.bucket), ('Key', self.key), ('UploadId', upload_id),
+        ]))
+
+    def upload_part(self):
+        directory = self.server.upload_dir(self.query['uploadId'])
+        if not os.path.isdir(directory):
+            self.error(404, 'NoSuchUpload', 'The specified upload does not exist.')
+            return
+        number = int(self.query['partNumber'])
+        with self.server.lock:
+            self.server.active_parts += 1
+            self.server.max_concurrent_parts = max(self.server.max_concurrent_parts, self.server.active_parts)
+        try:
+            etag = self.write_body_to(os.path.join(directory, f'{number:05d}.part'))
+            time.sleep(self.server.part_delay)
+        finally:
+            with self.server.lock:
+                self.server.active_parts -= 1
+        self.respond(200, headers={'ETag': f'"{etag}"'})
+
+    def complete_multipart_upload(self):
+        directory = self.server.upload_dir(self.query['uploadId'])
+        if not os.path.isdir(directory):
+            self.error(404, 'NoSuchUpload', 'The specified upload does not exist.')
+            return
+        request = ElementTree.fromstring(b''.join(self.read_body()))
+        numbers = [int(part.findtext(f'{{{S3_NS}}}PartNumber') or part.findtext('PartNumber'))
+                   for part in request.iter() if part.tag.endswith('Part')]
+
+        path = self.server.object_path(self.bucket, self.key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        digests = []
+        with open(temp_path, 'wb') as target:
+            for number in sorted(numbers):
+                part_path = os.path.join(directory, f'{number:05d}.part')
+                if not os.path.isfile(part_path):
+                    target.close()
+                    os.remove(temp_path)
+                    self.error(400, 'InvalidPart', f'Part {number} was not uploaded.')
+                    return
+                digests.append(bytes.fromhex(md5_file(part_path)))
+                with open(part_path, 'rb') as source:
+                    shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+        os.replace(temp_path, path)
+        shutil.rmtree(directory)
+
+        etag = f'"{hashlib.md5(b"".join(digests)).hexdigest()}-{len(digests)}"'
+        self.respond_xml(200, self.element('CompleteMultipartUploadResult', [
+            ('Location', f'/{self.bucket}/{quote(self.key)}'), ('Bucket', self.bucket),
+            ('Key', self.key), ('ETag', etag),
+        ]))
+
+    def abort_multipart_upload(self):
+        shutil.rmtree(self.server.upload_dir(self.query['uploadId']), ignore_errors=True)
+        self.respond(204)
+
+
+def serve(root, host='127.0.0.1', port=0):
+    """在后台线程启动服务;返回 server,地址为 server.server_address,用 server.shutdown() 停止。"""
+    root = os.path.abspath(root)
+    os.makedirs(root, exist_ok=True)
+    server = LocalS3Server((host, port), root)
+    threading.Thread(target=server.serve_forever, name='local-s3', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local filesystem-backed S3 stand-in')
+    parser.add_argument('--root', default='local-s3', help='Directory that holds the buckets')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    options = parser.parse_args()
+    os.makedirs(options.root, exist_ok=True)
+    server = LocalS3Server((options.host, options.port), os.path.abspath(options.root))
+    print(f'Local S3 stand-in on http://{options.host}:{options.port}, root {os.path.abspath(options.root)}')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -32,6 +32,20 @@ AWS_QUERYSTRING_AUTH = False
 AWS_S3_FILE_OVERWRITE = False
 AWS_DEFAULT_ACL = 'public-read'
 
+# 上传调优(your_project/storage.py):超过阈值的文件分片并行上传
+SUPABASE_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+SUPABASE_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+SUPABASE_MAX_CONCURRENCY = 8  # 每个文件同时上传的分片数
+SUPABASE_MAX_POOL_CONNECTIONS = 32  # 进程共享的连接池大小,应不小于并发上传数 x 分片并发数
+SUPABASE_MAX_ATTEMPTS = 5  # 失败请求按指数退避重试
+SUPABASE_METRICS_LOG_INTERVAL = 300  # 每隔多少秒在日志中输出一次上传统计,None 关闭
+
+# 离线测试:先运行 python -m your_project.local_s3,再设置 LOCAL_S3_URL=http://127.0.0.1:9000
+if os.getenv('LOCAL_S3_URL'):
+    AWS_S3_ENDPOINT_URL = os.getenv('LOCAL_S3_URL')
+    AWS_S3_CUSTOM_DOMAIN = None
+    AWS_ACCESS_KEY_ID = AWS_SECRET_ACCESS_KEY = 'local'
+
 # 允许的主机
 ALLOWED_HOSTS = ['*']  # 在生产环境中要设置具体的域名
 
@@ -1,11 +1,162 @@
+import collections
+import logging
+import threading
+import time
+
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from django.conf import settings
 from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class TransferMetrics:
+    """上传吞吐量与延迟统计(进程内,线程安全)"""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=window)  # 最近 window 次上传的耗时(秒)
+        self.uploads = 0
+        self.failures = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self._reported_at = time.monotonic()
+
+    def record(self, size, seconds):
+        with self._lock:
+            self.uploads += 1
+            self.bytes += size
+            self.seconds += seconds
+            self._latencies.append(seconds)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def report_due(self, interval):
+        """距上次汇总超过 interval 秒时返回 True(每个间隔只有一个线程拿到)"""
+        with self._lock:
+            now = time.monotonic()
+            if interval is None or now - self._reported_at < interval:
+                return False
+            self._reported_at = now
+            return True
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            uploads, failures, size, seconds = self.uploads, self.failures, self.bytes, self.seconds
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1)
+
+        return {
+            'uploads': uploads,
+            'failures': failures,
+            'bytes': size,
+            'throughput_mb_s': round(size / MB / seconds, 2) if seconds else None,
+            'latency_ms': {'p50': percentile(0.50), 'p95': percentile(0.95), 'p99': percentile(0.99),
+                           'max': percentile(1.0)},
+        }
+
+
+upload_metrics = TransferMetrics()
+
+# 每个进程共用一个 S3 客户端,所有线程和分片上传共享它的连接池
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def shared_client(storage):
+    key = (storage.endpoint_url, storage.region_name, storage.access_key)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = storage._create_session().client(
+                's3',
+                region_name=storage.region_name,
+                use_ssl=storage.use_ssl,
+                endpoint_url=storage.endpoint_url,
+                config=storage.client_config,
+                verify=storage.verify,
+            )
+            _clients[key] = client
+    return client
+
 
 class SupabaseStorage(S3Boto3Storage):
-    location = 'bid_documents'  # 存储桶中的子文件夹 
+    location = 'bid_documents'  # 存储桶中的子文件夹
     file_overwrite = False
     default_acl = 'public-read'
-    
+
     def get_default_settings(self):
         defaults = super().get_default_settings()
         defaults['addressing_style'] = 'path'
-        return defaults 
\ No newline at end of file
+        # 大文件分片并行上传;AWS_S3_TRANSFER_CONFIG 仍可整体覆盖
+        if defaults.get('transfer_config') is None:
+            defaults['transfer_config'] = TransferConfig(
+                multipart_threshold=getattr(settings, 'SUPABASE_MULTIPART_THRESHOLD', 8 * MB),
+                multipart_chunksize=getattr(settings, 'SUPABASE_MULTIPART_CHUNKSIZE', 8 * MB),
+                max_concurrency=getattr(settings, 'SUPABASE_MAX_CONCURRENCY', 8),
+                use_threads=True,
+            )
+        # 连接池大小、超时,以及带指数退避的重试('standard' 模式);AWS_S3_CLIENT_CONFIG 仍可整体覆盖
+        if defaults.get('client_config') is None:
+            defaults['client_config'] = Config(
+                s3={'addressing_style': 'path'},
+                signature_version='s3v4',
+                max_pool_connections=getattr(settings, 'SUPABASE_MAX_POOL_CONNECTIONS', 32),
+                retries={'max_attempts': getattr(settings, 'SUPABASE_MAX_ATTEMPTS', 5), 'mode': 'standard'},
+                connect_timeout=5,
+                read_timeout=60,
+                tcp_keepalive=True,
+            )
+        return defaults
+
+    @property
+    def connection(self):
+        connection = getattr(self._connections, 'connection', None)
+        if connection is None:
+            # boto3 resource 不是线程安全的,仍然每个线程一个;但底层客户端(和连接池)是共享的
+            connection = super().connection
+            connection.meta.client = shared_client(self)
+        return connection
+
+    def _save(self, name, content):
+        size = getattr(content, 'size', None) or 0
+        started = time.monotonic()
+        try:
+            name = super()._save(name, content)
+        except Exception:
+            upload_metrics.record_failure()
+            raise
+        seconds = time.monotonic() - started
+        upload_metrics.record(size, seconds)
+        logger.info('Uploaded %s: %d bytes in %.3fs (%.2f MB/s)',
+                    name, size, seconds, size / MB / seconds if seconds else 0)
+        # 定期输出汇总(吞吐量、失败数、延迟分位数);SUPABASE_METRICS_LOG_INTERVAL = None 关闭
+        if upload_metrics.report_due(getattr(settings, 'SUPABASE_METRICS_LOG_INTERVAL', 300)):
+            logger.info('Upload metrics: %s', upload_metrics.snapshot())
+        return name
+
+    def presigned_put_url(self, name, expire, content_type=None):
+        """
+        短时有效的预签名 PUT 地址,只能写入 name 这一个对象;客户端直接上传到存储,
+        不经过应用服务器。返回 (url, 上传时必须携带的请求头)。
+        """
+        params = {'Bucket': self.bucket_name, 'Key': self._normalize_name(clean_name(name))}
+        headers = {}
+        if content_type:
+            params['ContentType'] = headers['Content-Type'] = content_type
+        if self.default_acl:
+            params['ACL'] = headers['x-amz-acl'] = self.default_acl
+        url = self.bucket.meta.client.generate_presigned_url(
+            'put_object', Params=params, ExpiresIn=expire, HttpMethod='PUT',
+        )
+        return url, headers